@@ -5,18 +5,75 @@
 
 import logging
 import re
+import sys
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Self
 
 logger = logging.getLogger("papagai.markdown")
 
-# Regex pattern for frontmatter key: value pairs
+# Regex pattern for frontmatter key: value pairs, one per line
 # Matches: key_name: value
-KEY_VALUE_PATTERN = re.compile(r"^([a-zA-Z0-9_-]+):\s*(.*)$")
+KEY_VALUE_PATTERN = re.compile(r"^([a-zA-Z0-9_-]+):[^\S\n]*(.*)$", re.MULTILINE)
 
+# Regex pattern for the characters that structure a tools value
+# Matches: one of ( ) { } ,
+TOOLS_DELIMITER_PATTERN = re.compile(r"[(){},]")
 
-@dataclass
+
+@lru_cache(maxsize=256)
+def _parse_frontmatter(content: str) -> tuple[tuple[tuple[str, str], ...], str]:
+    """
+    Split markdown content into its frontmatter and text.
+
+    The result is cached by content so repeated parses of the same
+    document are a lookup. It is returned as immutable tuples, callers
+    must build their own dict from it.
+
+    Args:
+        content: Markdown content as a string
+
+    Returns:
+        Tuple of (frontmatter key-value pairs, text)
+    """
+    # Check if content starts with a --- line
+    block_start = content.find("\n") + 1
+    if not block_start or content[:block_start].strip() != "---":
+        return (), content
+
+    # Find the closing --- line, skipping over any --- that is only part
+    # of a line
+    pos = block_start
+    while True:
+        idx = content.find("---", pos)
+        if idx == -1:
+            # No closing --- found, so there is no frontmatter
+            return (), content
+        line_start = content.rfind("\n", 0, idx) + 1
+        line_end = content.find("\n", idx)
+        if line_end == -1:
+            line_end = len(content)
+        if content[line_start:line_end].strip() == "---":
+            break
+        pos = line_end
+
+    frontmatter = {}
+    text = content[line_end + 1 :]
+
+    # A value runs from its key up to the next key line, so any lines in
+    # between are continuation lines of a multi-line value.
+    block = content[block_start:line_start]
+    matches = list(KEY_VALUE_PATTERN.finditer(block))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(block)
+        # Keys come from a small vocabulary, share one string object each
+        frontmatter[sys.intern(match.group(1))] = block[match.start(2) : end].strip()
+
+    return tuple(frontmatter.items()), text
+
+
+@dataclass(slots=True)
 class Markdown:
     """
     Markdown file with parsed frontmatter.
@@ -42,46 +99,12 @@ class Markdown:
         Returns:
             Markdown instance with parsed frontmatter
         """
-        lines = content.split("\n")
-
-        # Check if content starts with ---
-        if not lines or lines[0].strip() != "---":
-            return cls(frontmatter={}, text=content)
-
-        # Find the closing ---
-        current_key = None
-        current_value = []
-
-        frontmatter = {}
-        text = content  # Default to full content if no closing --- found
-
-        for idx, line in enumerate(lines[1:], 1):
-            if line.strip() == "---":
-                # End of frontmatter
-                if current_key:
-                    frontmatter[current_key] = "\n".join(current_value).strip()
-                text = "\n".join(lines[idx + 1 :])
-                break
-
-            # Check if this is a key: value line using regex
-            match = KEY_VALUE_PATTERN.match(line)
-            if match:
-                # Save previous key-value if exists
-                if current_key:
-                    frontmatter[current_key] = "\n".join(current_value).strip()
-
-                # Start new key-value
-                current_key = match.group(1)
-                current_value = [match.group(2)]
-            elif current_key:
-                # Continuation of multi-line value
-                current_value.append(line)
-        else:
-            # No closing --- found, reset to empty frontmatter
-            frontmatter = {}
-            text = content
+        if not content.lstrip().startswith("---"):
+            # No frontmatter, skip the parser and keep this out of its cache
+            return cls._from_parsed({}, content)
 
-        return cls(frontmatter=frontmatter, text=text)
+        frontmatter, text = _parse_frontmatter(content)
+        return cls._from_parsed(dict(frontmatter), text)
 
     @classmethod
     def from_file(cls, file_path: Path) -> Self:
@@ -104,13 +127,24 @@ class Markdown:
         content = file_path.read_text()
         return cls.from_string(content)
 
+    @classmethod
+    def _from_parsed(cls, frontmatter: dict[str, str], text: str) -> Self:
+        """
+        Create an instance from already parsed frontmatter and text.
+
+        Subclasses override this to extract their fields from the
+        frontmatter, from_string() and from_file() go through here.
+        """
+        return cls(frontmatter=frontmatter, text=text)
 
-@dataclass
+
+@dataclass(slots=True)
 class MarkdownInstructions(Markdown):
     """
     Markdown file with parsed instructions frontmatter.
 
-    Inherits from Markdown and adds convenience fields for description and tools.
+    Inherits from Markdown and adds convenience fields for description and tools,
+    which from_string() and from_file() fill in from the frontmatter.
 
     Attributes:
         description: Description from frontmatter, or empty string if not found
@@ -121,67 +155,27 @@ class MarkdownInstructions(Markdown):
     tools: list[str] = field(default_factory=list)
 
     @classmethod
-    def from_string(cls, content: str) -> Self:
-        """
-        Parse a markdown string and extract instructions frontmatter.
-
-        Parses the description and tools from the frontmatter.
-        Tools are comma-separated, but commas inside parentheses/braces are preserved.
-
-        Args:
-            content: Markdown content as a string
-
-        Returns:
-            MarkdownInstructions instance with parsed frontmatter and fields
-        """
-        # First parse the base frontmatter
-        base = Markdown.from_string(content)
-
-        # Extract description
-        description = base.frontmatter.get("description", "")
-
-        # Extract and parse tools
-        tools_str = base.frontmatter.get("tools", "")
-        tools = cls._parse_tools(tools_str)
-
-        return cls(
-            frontmatter=base.frontmatter,
-            text=base.text,
-            description=description,
-            tools=tools,
-        )
-
-    @classmethod
-    def from_file(cls, file_path: Path) -> Self:
+    def _from_parsed(cls, frontmatter: dict[str, str], text: str) -> Self:
         """
-        Parse a markdown file and extract instructions frontmatter.
+        Create an instance from already parsed frontmatter and text.
 
         Parses the description and tools from the frontmatter.
         Tools are comma-separated, but commas inside parentheses/braces are preserved.
-
-        Args:
-            file_path: Path to the markdown file
-
-        Returns:
-            MarkdownInstructions instance with parsed frontmatter and fields
-
-        Raises:
-            FileNotFoundError: If the file does not exist
-            PermissionError: If the file cannot be read
         """
-        # First parse the base frontmatter
-        base = Markdown.from_file(file_path)
+        if not frontmatter:
+            # Empty content or no frontmatter, nothing to extract
+            return cls(frontmatter=frontmatter, text=text)
 
         # Extract description
-        description = base.frontmatter.get("description", "")
+        description = frontmatter.get("description", "")
 
         # Extract and parse tools
-        tools_str = base.frontmatter.get("tools", "")
+        tools_str = frontmatter.get("tools", "")
         tools = cls._parse_tools(tools_str)
 
         return cls(
-            frontmatter=base.frontmatter,
-            text=base.text,
+            frontmatter=frontmatter,
+            text=text,
             description=description,
             tools=tools,
         )
@@ -206,12 +200,7 @@ class MarkdownInstructions(Markdown):
         combined_text = self.text + "\n" + other.text
 
         # Combine tools, preserving order and removing duplicates
-        seen = set()
-        combined_tools = []
-        for tool in self.tools + other.tools:
-            if tool not in seen:
-                seen.add(tool)
-                combined_tools.append(tool)
+        combined_tools = list(dict.fromkeys(self.tools + other.tools))
 
         # Merge frontmatter (self takes precedence for duplicate keys)
         combined_frontmatter = {**other.frontmatter, **self.frontmatter}
@@ -240,29 +229,28 @@ class MarkdownInstructions(Markdown):
         if not tools_str:
             return []
 
-        # Split by comma, but only if not inside parentheses or braces
+        # Split by comma, but only if not inside parentheses or braces.
+        # Only the structural characters are visited, everything between
+        # them is sliced out of the string as a whole.
         tools = []
-        current_tool = []
+        start = 0
         depth = 0  # Track nesting depth of () and {}
 
-        for char in tools_str:
+        for match in TOOLS_DELIMITER_PATTERN.finditer(tools_str):
+            char = match.group()
             if char in "({":
                 depth += 1
-                current_tool.append(char)
             elif char in ")}":
                 depth -= 1
-                current_tool.append(char)
-            elif char == "," and depth == 0:
+            elif depth == 0:
                 # Comma at top level - end of current tool
-                tool = "".join(current_tool).strip()
+                tool = tools_str[start : match.start()].strip()
                 if tool:
                     tools.append(tool)
-                current_tool = []
-            else:
-                current_tool.append(char)
+                start = match.end()
 
         # Add the last tool
-        tool = "".join(current_tool).strip()
+        tool = tools_str[start:].strip()
         if tool:
             tools.append(tool)
 
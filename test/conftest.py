@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Shared pytest fixtures."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Run tests marked slow first when distributing tests with pytest-xdist.
+
+    The scheduler hands out tests in collection order, starting the slow
+    ones early keeps a worker from picking them up last.
+    """
+    if config.getoption("dist", "no") == "no":
+        return
+    items.sort(key=lambda item: item.get_closest_marker("slow") is None)
+
+
+@pytest.fixture(scope="class")
+def run_command_patch():
+    """Patch run_command in papagai.worktree for a whole test class."""
+    with patch("papagai.worktree.run_command") as mock_run:
+        yield mock_run
+
+
+@pytest.fixture
+def mock_run(run_command_patch):
+    """The class's patched run_command, reset for each test."""
+    run_command_patch.reset_mock(return_value=True, side_effect=True)
+    return run_command_patch
+
+
+@pytest.fixture
+def xdg_tasks_dir(tmp_path, monkeypatch):
+    """Set up a temporary XDG_CONFIG_HOME with an empty tasks directory."""
+    xdg_config_home = tmp_path / "config"
+    xdg_tasks_dir = xdg_config_home / "papagai" / "tasks"
+    os.makedirs(xdg_tasks_dir, exist_ok=True)
+
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(xdg_config_home))
+
+    return xdg_tasks_dir
+
+
+@pytest.fixture(scope="class")
+def empty_xdg_config_home(tmp_path_factory):
+    """An XDG_CONFIG_HOME with an empty tasks directory, shared by a test class."""
+    xdg_config_home = tmp_path_factory.mktemp("config")
+    os.makedirs(xdg_config_home / "papagai" / "tasks", exist_ok=True)
+    return xdg_config_home
+
+
+@pytest.fixture
+def xdg_tasks_ro(empty_xdg_config_home, monkeypatch):
+    """
+    Set XDG_CONFIG_HOME to the shared empty tasks tree.
+
+    The tree is shared between tests, tests must not write to it.
+    """
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(empty_xdg_config_home))
+    return empty_xdg_config_home / "papagai" / "tasks"
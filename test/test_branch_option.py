@@ -121,6 +121,7 @@ class TestBranchExists:
                 check=False,
             )
 
+    @pytest.mark.slow
     @pytest.mark.parametrize(
         "branch,expected", [("main", True), ("does-not-exist", False)]
     )
@@ -206,6 +207,7 @@ class TestCreateBranchIfNotExists:
             with pytest.raises(subprocess.CalledProcessError):
                 create_branch_if_not_exists(mock_repo, "new-branch", "main")
 
+    @pytest.mark.slow
     def test_create_branch_with_real_repo_creates_branch(self, real_git_repo):
         """Test create_branch_if_not_exists with real git repository."""
         # Create a new branch
@@ -216,6 +218,7 @@ class TestCreateBranchIfNotExists:
         # Verify branch was created
         assert branch_exists(real_git_repo, "feature") is True
 
+    @pytest.mark.slow
     def test_create_branch_with_real_repo_returns_existing(self, real_git_repo):
         """Test create_branch_if_not_exists returns existing branch."""
         # Create branch first
@@ -352,6 +355,7 @@ class TestMergeIntoTargetBranch:
             assert first_call[1]["cwd"] == mock_repo
             assert first_call[1]["check"] is False
 
+    @pytest.mark.slow
     def test_merge_with_real_repo_succeeds(self, real_git_repo):
         """Test merge with real repository performs fast-forward merge."""
         # Create a feature branch and make a commit
@@ -399,6 +403,7 @@ class TestMergeIntoTargetBranch:
         )
         assert "Add test file" in log_result.stdout
 
+    @pytest.mark.slow
     def test_merge_with_real_repo_fails_on_diverged_branches(self, real_git_repo):
         """Test merge fails when branches have diverged."""
         # Create feature branch and commit
@@ -36,7 +36,8 @@ def real_git_repo(tmp_path):
         ["git", "init", "-b", "main"],
         cwd=repo_dir,
         check=True,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
 
     # Configure git user for commits
@@ -44,13 +45,15 @@ def real_git_repo(tmp_path):
         ["git", "config", "user.name", "Test User"],
         cwd=repo_dir,
         check=True,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
     subprocess.run(
         ["git", "config", "user.email", "test@example.com"],
         cwd=repo_dir,
         check=True,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
 
     # Create an initial commit
@@ -60,13 +63,15 @@ def real_git_repo(tmp_path):
         ["git", "add", "README.md"],
         cwd=repo_dir,
         check=True,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
     subprocess.run(
         ["git", "commit", "-m", "Initial commit"],
         cwd=repo_dir,
         check=True,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
 
     return repo_dir
@@ -113,143 +118,145 @@ Do something interesting.
         )
         return instructions
 
+    @pytest.fixture
+    def mock_claude_run(self):
+        """Patch claude_run and drop the recorded calls once the test is done."""
+        with patch("papagai.cli.claude_run") as m:
+            m.return_value = 0
+            yield m
+            m.reset_mock(return_value=True, side_effect=True)
+
     @pytest.mark.parametrize("command", ["do", "code"])
     def test_keep_true_passed_to_claude_run(
-        self, runner, command, mock_instructions_file
+        self, runner, command, mock_instructions_file, mock_claude_run
     ):
         """Test --keep flag is passed correctly to claude_run for do and code commands."""
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
-
-            result = runner.invoke(
-                papagai,
-                [command, "--keep", str(mock_instructions_file)],
-            )
+        result = runner.invoke(
+            papagai,
+            [command, "--keep", str(mock_instructions_file)],
+            catch_exceptions=False,
+        )
 
-            mock_claude_run.assert_called_once()
-            call_kwargs = mock_claude_run.call_args[1]
-            assert call_kwargs["keep"] is True
-            assert result.exit_code == 0
+        mock_claude_run.assert_called_once()
+        call_kwargs = mock_claude_run.call_args[1]
+        assert call_kwargs["keep"] is True
+        assert result.exit_code == 0
 
     @pytest.mark.parametrize("command", ["do", "code"])
     def test_no_keep_passed_to_claude_run(
-        self, runner, command, mock_instructions_file
+        self, runner, command, mock_instructions_file, mock_claude_run
     ):
         """Test --no-keep flag is passed correctly to claude_run for do and code commands."""
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
-
-            result = runner.invoke(
-                papagai,
-                [command, "--no-keep", str(mock_instructions_file)],
-            )
+        result = runner.invoke(
+            papagai,
+            [command, "--no-keep", str(mock_instructions_file)],
+            catch_exceptions=False,
+        )
 
-            mock_claude_run.assert_called_once()
-            call_kwargs = mock_claude_run.call_args[1]
-            assert call_kwargs["keep"] is False
-            assert result.exit_code == 0
+        mock_claude_run.assert_called_once()
+        call_kwargs = mock_claude_run.call_args[1]
+        assert call_kwargs["keep"] is False
+        assert result.exit_code == 0
 
     @pytest.mark.parametrize("command", ["do", "code"])
-    def test_default_is_no_keep(self, runner, command, mock_instructions_file):
+    def test_default_is_no_keep(
+        self, runner, command, mock_instructions_file, mock_claude_run
+    ):
         """Test that default behavior is --no-keep for do and code commands."""
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
-
-            result = runner.invoke(
-                papagai,
-                [command, str(mock_instructions_file)],
-            )
+        result = runner.invoke(
+            papagai,
+            [command, str(mock_instructions_file)],
+            catch_exceptions=False,
+        )
 
-            mock_claude_run.assert_called_once()
-            call_kwargs = mock_claude_run.call_args[1]
-            assert call_kwargs["keep"] is False
-            assert result.exit_code == 0
+        mock_claude_run.assert_called_once()
+        call_kwargs = mock_claude_run.call_args[1]
+        assert call_kwargs["keep"] is False
+        assert result.exit_code == 0
 
-    def test_review_keep_true_passed_to_claude_run(self, runner):
+    def test_review_keep_true_passed_to_claude_run(self, runner, mock_claude_run):
         """Test --keep flag is passed correctly to claude_run for review command."""
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            with patch("papagai.cli.get_builtin_primers_dir") as mock_get_dir:
-                # Create a mock primers directory
-                mock_dir = MagicMock()
-                mock_get_dir.return_value = mock_dir
-
-                # Mock the review primer file
-                mock_task_file = MagicMock()
-                mock_task_file.exists.return_value = True
-                mock_dir.__truediv__.return_value = mock_task_file
-
-                with patch(
-                    "papagai.cli.MarkdownInstructions.from_file"
-                ) as mock_from_file:
-                    mock_instructions = MagicMock()
-                    mock_from_file.return_value = mock_instructions
-                    mock_claude_run.return_value = 0
-
-                    result = runner.invoke(papagai, ["review", "--keep"])
-
-                    mock_claude_run.assert_called_once()
-                    call_kwargs = mock_claude_run.call_args[1]
-                    assert call_kwargs["keep"] is True
-                    assert result.exit_code == 0
-
-    def test_review_no_keep_passed_to_claude_run(self, runner):
+        with patch("papagai.cli.get_builtin_primers_dir") as mock_get_dir:
+            # Create a mock primers directory
+            mock_dir = MagicMock()
+            mock_get_dir.return_value = mock_dir
+
+            # Mock the review primer file
+            mock_task_file = MagicMock()
+            mock_task_file.exists.return_value = True
+            mock_dir.__truediv__.return_value = mock_task_file
+
+            with patch("papagai.cli.MarkdownInstructions.from_file") as mock_from_file:
+                mock_instructions = MagicMock()
+                mock_from_file.return_value = mock_instructions
+
+                result = runner.invoke(
+                    papagai, ["review", "--keep"], catch_exceptions=False
+                )
+
+                mock_claude_run.assert_called_once()
+                call_kwargs = mock_claude_run.call_args[1]
+                assert call_kwargs["keep"] is True
+                assert result.exit_code == 0
+
+    def test_review_no_keep_passed_to_claude_run(self, runner, mock_claude_run):
         """Test --no-keep flag is passed correctly to claude_run for review command."""
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            with patch("papagai.cli.get_builtin_primers_dir") as mock_get_dir:
-                # Create a mock primers directory
-                mock_dir = MagicMock()
-                mock_get_dir.return_value = mock_dir
-
-                # Mock the review primer file
-                mock_task_file = MagicMock()
-                mock_task_file.exists.return_value = True
-                mock_dir.__truediv__.return_value = mock_task_file
-
-                with patch(
-                    "papagai.cli.MarkdownInstructions.from_file"
-                ) as mock_from_file:
-                    mock_instructions = MagicMock()
-                    mock_from_file.return_value = mock_instructions
-                    mock_claude_run.return_value = 0
-
-                    result = runner.invoke(papagai, ["review", "--no-keep"])
-
-                    mock_claude_run.assert_called_once()
-                    call_kwargs = mock_claude_run.call_args[1]
-                    assert call_kwargs["keep"] is False
-                    assert result.exit_code == 0
-
-    def test_review_default_is_no_keep(self, runner):
+        with patch("papagai.cli.get_builtin_primers_dir") as mock_get_dir:
+            # Create a mock primers directory
+            mock_dir = MagicMock()
+            mock_get_dir.return_value = mock_dir
+
+            # Mock the review primer file
+            mock_task_file = MagicMock()
+            mock_task_file.exists.return_value = True
+            mock_dir.__truediv__.return_value = mock_task_file
+
+            with patch("papagai.cli.MarkdownInstructions.from_file") as mock_from_file:
+                mock_instructions = MagicMock()
+                mock_from_file.return_value = mock_instructions
+
+                result = runner.invoke(
+                    papagai, ["review", "--no-keep"], catch_exceptions=False
+                )
+
+                mock_claude_run.assert_called_once()
+                call_kwargs = mock_claude_run.call_args[1]
+                assert call_kwargs["keep"] is False
+                assert result.exit_code == 0
+
+    def test_review_default_is_no_keep(self, runner, mock_claude_run):
         """Test that default behavior is --no-keep for review command."""
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            with patch("papagai.cli.get_builtin_primers_dir") as mock_get_dir:
-                # Create a mock primers directory
-                mock_dir = MagicMock()
-                mock_get_dir.return_value = mock_dir
+        with patch("papagai.cli.get_builtin_primers_dir") as mock_get_dir:
+            # Create a mock primers directory
+            mock_dir = MagicMock()
+            mock_get_dir.return_value = mock_dir
 
-                # Mock the review primer file
-                mock_task_file = MagicMock()
-                mock_task_file.exists.return_value = True
-                mock_dir.__truediv__.return_value = mock_task_file
+            # Mock the review primer file
+            mock_task_file = MagicMock()
+            mock_task_file.exists.return_value = True
+            mock_dir.__truediv__.return_value = mock_task_file
 
-                with patch(
-                    "papagai.cli.MarkdownInstructions.from_file"
-                ) as mock_from_file:
-                    mock_instructions = MagicMock()
-                    mock_from_file.return_value = mock_instructions
-                    mock_claude_run.return_value = 0
+            with patch("papagai.cli.MarkdownInstructions.from_file") as mock_from_file:
+                mock_instructions = MagicMock()
+                mock_from_file.return_value = mock_instructions
 
-                    result = runner.invoke(papagai, ["review"])
+                result = runner.invoke(papagai, ["review"], catch_exceptions=False)
 
-                    mock_claude_run.assert_called_once()
-                    call_kwargs = mock_claude_run.call_args[1]
-                    assert call_kwargs["keep"] is False
-                    assert result.exit_code == 0
+                mock_claude_run.assert_called_once()
+                call_kwargs = mock_claude_run.call_args[1]
+                assert call_kwargs["keep"] is False
+                assert result.exit_code == 0
 
 
+@pytest.mark.usefixtures("mock_run")
 class TestWorktreeKeepCleanupBehavior:
     """Test Worktree._cleanup() behavior with keep parameter."""
 
+    @pytest.fixture(autouse=True)
+    def _worktree_log_level(self, caplog):
+        """Capture papagai.worktree log records at all levels."""
+        caplog.set_level(logging.DEBUG, logger="papagai.worktree")
+
     @pytest.fixture
     def mock_worktree_keep_true(self, mock_git_repo):
         """Create a mock Worktree instance with keep=True."""
@@ -274,135 +281,139 @@ class TestWorktreeKeepCleanupBehavior:
             keep=False,
         )
 
-    def test_cleanup_with_keep_true_skips_removal(self, mock_worktree_keep_true):
+    def test_cleanup_with_keep_true_skips_removal(
+        self, mock_worktree_keep_true, mock_run
+    ):
         """Test cleanup with keep=True skips directory removal but updates latest branch."""
         # Create the worktree directory
         mock_worktree_keep_true.worktree_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            # Mock git diff to succeed (no changes)
-            result = MagicMock()
-            result.returncode = 0
-            mock_run.return_value = result
-
-            mock_worktree_keep_true._cleanup()
-
-            # Should call:
-            # 1. git diff --quiet --exit-code
-            # 2. git branch -f papagai/latest <branch> (from repoint_latest_branch)
-            # Should NOT call git worktree remove
-            assert mock_run.call_count == 2
-            calls = mock_run.call_args_list
+        # Mock git diff to succeed (no changes)
+        result = MagicMock()
+        result.returncode = 0
+        mock_run.return_value = result
+
+        mock_worktree_keep_true._cleanup()
+
+        # Should call:
+        # 1. git diff --quiet --exit-code
+        # 2. git branch -f papagai/latest <branch> (from repoint_latest_branch)
+        # Should NOT call git worktree remove
+        assert mock_run.call_count == 2
+        calls = mock_run.call_args_list
 
-            # Check git diff was called
-            assert calls[0][0][0][0] == "git"
-            assert calls[0][0][0][1] == "diff"
-            assert "--quiet" in calls[0][0][0]
+        # Check git diff was called
+        assert calls[0][0][0][0] == "git"
+        assert calls[0][0][0][1] == "diff"
+        assert "--quiet" in calls[0][0][0]
 
-            # Check git branch -f was called (latest branch update)
-            assert calls[1][0][0][0] == "git"
-            assert calls[1][0][0][1] == "branch"
-            assert calls[1][0][0][2] == "-f"
-            assert calls[1][0][0][3] == LATEST_BRANCH
+        # Check git branch -f was called (latest branch update)
+        assert calls[1][0][0][0] == "git"
+        assert calls[1][0][0][1] == "branch"
+        assert calls[1][0][0][2] == "-f"
+        assert calls[1][0][0][3] == LATEST_BRANCH
 
-            # Verify git worktree remove was NOT called
-            remove_calls = [c for c in calls if "remove" in c[0][0]]
-            assert len(remove_calls) == 0
+        # Verify git worktree remove was NOT called
+        remove_calls = [c for c in calls if "remove" in c[0][0]]
+        assert len(remove_calls) == 0
 
         # Directory should still exist
         assert mock_worktree_keep_true.worktree_dir.exists()
 
-    def test_cleanup_with_keep_true_logs_message(self, mock_worktree_keep_true, caplog):
+    def test_cleanup_with_keep_true_logs_message(
+        self, mock_worktree_keep_true, caplog, mock_run
+    ):
         """Test cleanup with keep=True logs a message about keeping worktree."""
         mock_worktree_keep_true.worktree_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = MagicMock(returncode=0)
 
-            with caplog.at_level(logging.INFO, logger="papagai.worktree"):
-                mock_worktree_keep_true._cleanup()
+        mock_worktree_keep_true._cleanup()
 
-            log_output = caplog.text
-            assert "Keeping worktree" in log_output
-            assert str(mock_worktree_keep_true.worktree_dir) in log_output
+        msgs = [r.getMessage() for r in caplog.records]
+        assert any("Keeping worktree" in m for m in msgs)
+        assert any(str(mock_worktree_keep_true.worktree_dir) in m for m in msgs)
 
-    def test_cleanup_with_keep_false_removes_directory(self, mock_worktree_keep_false):
+    def test_cleanup_with_keep_false_removes_directory(
+        self, mock_worktree_keep_false, mock_run
+    ):
         """Test cleanup with keep=False removes directory as normal."""
         # Create worktree directory with a file
         mock_worktree_keep_false.worktree_dir.mkdir(parents=True)
         test_file = mock_worktree_keep_false.worktree_dir / "test.txt"
         test_file.write_text("test content")
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = MagicMock(returncode=0)
 
-            mock_worktree_keep_false._cleanup()
+        mock_worktree_keep_false._cleanup()
 
-            # Directory should be removed
-            assert not mock_worktree_keep_false.worktree_dir.exists()
+        # Directory should be removed
+        assert not mock_worktree_keep_false.worktree_dir.exists()
 
-            # Verify git worktree remove was called
-            calls = mock_run.call_args_list
-            remove_calls = [
-                c for c in calls if len(c[0][0]) > 2 and c[0][0][2] == "remove"
-            ]
-            assert len(remove_calls) == 1
+        # Verify git worktree remove was called
+        calls = mock_run.call_args_list
+        remove_calls = [c for c in calls if len(c[0][0]) > 2 and c[0][0][2] == "remove"]
+        assert len(remove_calls) == 1
 
     def test_cleanup_with_keep_true_still_commits_changes(
-        self, mock_worktree_keep_true, caplog
+        self, mock_worktree_keep_true, caplog, mock_run
     ):
         """Test cleanup with keep=True still commits uncommitted changes."""
         mock_worktree_keep_true.worktree_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            # Track which commands are being called
-            call_count = [0]
-
-            def run_side_effect(cmd, **kwargs):
-                call_count[0] += 1
-                # First call is git diff - return non-zero to indicate changes present
-                if call_count[0] == 1 and cmd[1] == "diff":
-                    result = MagicMock()
-                    result.returncode = 1
-                    return result
-                # All other calls succeed
-                return MagicMock()
-
-            mock_run.side_effect = run_side_effect
-
-            with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
-                mock_worktree_keep_true._cleanup()
-
-            # Should call:
-            # 1. git diff --quiet --exit-code (returns 1)
-            # 2. git add -A
-            # 3. git commit -m "FIXME: changes left in worktree"
-            # 4. git branch -f papagai/latest <branch>
-            # Should NOT call git worktree remove
-            assert mock_run.call_count == 4
-
-            # Check that git add and git commit were called
-            calls = mock_run.call_args_list
-            add_call = calls[1][0][0]
-            commit_call = calls[2][0][0]
-
-            assert add_call == ["git", "add", "-A"]
-            assert commit_call == [
-                "git",
-                "commit",
-                "-m",
-                "FIXME: changes left in worktree",
-            ]
-
-            # Check warning message
-            log_output = caplog.text
-            assert "Uncommitted changes found in worktree" in log_output
-            assert "committing them" in log_output
-
-
+        # Track which commands are being called
+        call_count = [0]
+
+        def run_side_effect(cmd, **kwargs):
+            call_count[0] += 1
+            # First call is git diff - return non-zero to indicate changes present
+            if call_count[0] == 1 and cmd[1] == "diff":
+                result = MagicMock()
+                result.returncode = 1
+                return result
+            # All other calls succeed
+            return MagicMock()
+
+        mock_run.side_effect = run_side_effect
+
+        mock_worktree_keep_true._cleanup()
+
+        # Should call:
+        # 1. git diff --quiet --exit-code (returns 1)
+        # 2. git add -A
+        # 3. git commit -m "FIXME: changes left in worktree"
+        # 4. git branch -f papagai/latest <branch>
+        # Should NOT call git worktree remove
+        assert mock_run.call_count == 4
+
+        # Check that git add and git commit were called
+        calls = mock_run.call_args_list
+        add_call = calls[1][0][0]
+        commit_call = calls[2][0][0]
+
+        assert add_call == ["git", "add", "-A"]
+        assert commit_call == [
+            "git",
+            "commit",
+            "-m",
+            "FIXME: changes left in worktree",
+        ]
+
+        # Check warning message
+        msgs = [r.getMessage() for r in caplog.records]
+        assert any("Uncommitted changes found in worktree" in m for m in msgs)
+        assert any("committing them" in m for m in msgs)
+
+
+@pytest.mark.usefixtures("mock_run")
 class TestWorktreeOverlayFsKeepCleanupBehavior:
     """Test WorktreeOverlayFs._cleanup() behavior with keep parameter."""
 
+    @pytest.fixture(autouse=True)
+    def _worktree_log_level(self, caplog):
+        """Capture papagai.worktree log records at all levels."""
+        caplog.set_level(logging.DEBUG, logger="papagai.worktree")
+
     @pytest.fixture
     def mock_overlay_fs_keep_true(self, mock_git_repo, tmp_path):
         """Create a mock WorktreeOverlayFs instance with keep=True."""
@@ -431,70 +442,67 @@ class TestWorktreeOverlayFsKeepCleanupBehavior:
             mount_dir=mount_dir,
         )
 
-    def test_cleanup_with_keep_true_skips_unmount(self, mock_overlay_fs_keep_true):
+    def test_cleanup_with_keep_true_skips_unmount(
+        self, mock_overlay_fs_keep_true, mock_run
+    ):
         """Test cleanup with keep=True skips unmounting but updates latest branch."""
         mock_overlay_fs_keep_true.mount_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            # Track which commands are being called
-            call_count = [0]
-
-            def run_side_effect(cmd, **kwargs):
-                call_count[0] += 1
-                # First call is git diff - no changes
-                if call_count[0] == 1 and cmd[1] == "diff":
-                    result = MagicMock()
-                    result.returncode = 0
-                    return result
-                # All other calls succeed
-                return MagicMock()
-
-            mock_run.side_effect = run_side_effect
-
-            mock_overlay_fs_keep_true._cleanup()
-
-            # Should call:
-            # 1. git diff --quiet --exit-code (returns 0)
-            # 2. git fetch (pull branch from overlay)
-            # 3. git rev-parse --verify (verify branch)
-            # 4. git branch -f papagai/latest <branch>
-            # Should NOT call fusermount -u
-            assert mock_run.call_count == 4
+        # Track which commands are being called
+        call_count = [0]
 
-            calls = mock_run.call_args_list
+        def run_side_effect(cmd, **kwargs):
+            call_count[0] += 1
+            # First call is git diff - no changes
+            if call_count[0] == 1 and cmd[1] == "diff":
+                result = MagicMock()
+                result.returncode = 0
+                return result
+            # All other calls succeed
+            return MagicMock()
 
-            # Verify fusermount was NOT called
-            unmount_calls = [c for c in calls if c[0][0][0] == "fusermount"]
-            assert len(unmount_calls) == 0
+        mock_run.side_effect = run_side_effect
 
-            # Verify latest branch was updated
-            branch_calls = [
-                c for c in calls if len(c[0][0]) > 1 and c[0][0][1] == "branch"
-            ]
-            assert len(branch_calls) == 1
-            assert branch_calls[0][0][0][3] == LATEST_BRANCH
+        mock_overlay_fs_keep_true._cleanup()
+
+        # Should call:
+        # 1. git diff --quiet --exit-code (returns 0)
+        # 2. git fetch (pull branch from overlay)
+        # 3. git rev-parse --verify (verify branch)
+        # 4. git branch -f papagai/latest <branch>
+        # Should NOT call fusermount -u
+        assert mock_run.call_count == 4
+
+        calls = mock_run.call_args_list
+
+        # Verify fusermount was NOT called
+        unmount_calls = [c for c in calls if c[0][0][0] == "fusermount"]
+        assert len(unmount_calls) == 0
+
+        # Verify latest branch was updated
+        branch_calls = [c for c in calls if len(c[0][0]) > 1 and c[0][0][1] == "branch"]
+        assert len(branch_calls) == 1
+        assert branch_calls[0][0][0][3] == LATEST_BRANCH
 
         # Directory should still exist
         assert mock_overlay_fs_keep_true.overlay_base_dir.exists()
 
     def test_cleanup_with_keep_true_logs_message(
-        self, mock_overlay_fs_keep_true, caplog
+        self, mock_overlay_fs_keep_true, caplog, mock_run
     ):
         """Test cleanup with keep=True logs a message about keeping overlay."""
         mock_overlay_fs_keep_true.mount_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = MagicMock(returncode=0)
 
-            with caplog.at_level(logging.INFO, logger="papagai.worktree"):
-                mock_overlay_fs_keep_true._cleanup()
+        mock_overlay_fs_keep_true._cleanup()
 
-            log_output = caplog.text
-            assert "Keeping overlay mounted" in log_output
-            assert str(mock_overlay_fs_keep_true.mount_dir) in log_output
+        msgs = [r.getMessage() for r in caplog.records]
+        assert any("Keeping overlay mounted" in m for m in msgs)
+        assert any(str(mock_overlay_fs_keep_true.mount_dir) in m for m in msgs)
 
     def test_cleanup_with_keep_false_unmounts_and_removes(
-        self, mock_overlay_fs_keep_false
+        self, mock_overlay_fs_keep_false, mock_run
     ):
         """Test cleanup with keep=False unmounts and removes directories."""
         overlay_base = mock_overlay_fs_keep_false.overlay_base_dir
@@ -511,75 +519,86 @@ class TestWorktreeOverlayFsKeepCleanupBehavior:
             "papagai.worktree.WorktreeOverlayFs.get_fusermount_binary",
             return_value="fusermount",
         ):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock(returncode=0)
+            mock_run.return_value = MagicMock(returncode=0)
 
-                mock_overlay_fs_keep_false._cleanup()
+            mock_overlay_fs_keep_false._cleanup()
 
-                # Find the fusermount call
-                calls = mock_run.call_args_list
-                unmount_calls = [c for c in calls if c[0][0][0] == "fusermount"]
-                assert len(unmount_calls) == 1
-                assert unmount_calls[0][0][0] == ["fusermount", "-u", str(mount_dir)]
+            # Find the fusermount call
+            calls = mock_run.call_args_list
+            unmount_calls = [c for c in calls if c[0][0][0] == "fusermount"]
+            assert len(unmount_calls) == 1
+            assert unmount_calls[0][0][0] == ["fusermount", "-u", str(mount_dir)]
 
-                # Directory should be removed
-                assert not overlay_base.exists()
+            # Directory should be removed
+            assert not overlay_base.exists()
 
     def test_cleanup_with_keep_true_still_commits_changes(
-        self, mock_overlay_fs_keep_true, caplog
+        self, mock_overlay_fs_keep_true, caplog, mock_run
     ):
         """Test cleanup with keep=True still commits uncommitted changes."""
         mock_overlay_fs_keep_true.mount_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            # Track which commands are being called
-            call_count = [0]
-
-            def run_side_effect(cmd, **kwargs):
-                call_count[0] += 1
-                # First call is git diff - return non-zero to indicate changes present
-                if call_count[0] == 1 and cmd[1] == "diff":
-                    result = MagicMock()
-                    result.returncode = 1
-                    return result
-                # All other calls succeed
-                return MagicMock()
-
-            mock_run.side_effect = run_side_effect
-
-            with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
-                mock_overlay_fs_keep_true._cleanup()
-
-            # Should call:
-            # 1. git diff --quiet --exit-code (returns 1)
-            # 2. git add -A
-            # 3. git commit -m "FIXME: changes left in worktree"
-            # 4. git fetch (pull branch from overlay)
-            # 5. git rev-parse --verify (verify branch)
-            # 6. git branch -f papagai/latest <branch>
-            # Should NOT call fusermount -u
-            assert mock_run.call_count == 6
-
-            # Check that git add and git commit were called
-            calls = mock_run.call_args_list
-            add_call = calls[1][0][0]
-            commit_call = calls[2][0][0]
-
-            assert add_call == ["git", "add", "-A"]
-            assert commit_call == [
-                "git",
-                "commit",
-                "-m",
-                "FIXME: changes left in worktree",
-            ]
-
-            # Check warning message
-            log_output = caplog.text
-            assert "Uncommitted changes found in worktree" in log_output
-
-
+        # Track which commands are being called
+        call_count = [0]
+
+        def run_side_effect(cmd, **kwargs):
+            call_count[0] += 1
+            # First call is git diff - return non-zero to indicate changes present
+            if call_count[0] == 1 and cmd[1] == "diff":
+                result = MagicMock()
+                result.returncode = 1
+                return result
+            # All other calls succeed
+            return MagicMock()
+
+        mock_run.side_effect = run_side_effect
+
+        mock_overlay_fs_keep_true._cleanup()
+
+        # Should call:
+        # 1. git diff --quiet --exit-code (returns 1)
+        # 2. git add -A
+        # 3. git commit -m "FIXME: changes left in worktree"
+        # 4. git fetch (pull branch from overlay)
+        # 5. git rev-parse --verify (verify branch)
+        # 6. git branch -f papagai/latest <branch>
+        # Should NOT call fusermount -u
+        assert mock_run.call_count == 6
+
+        # Check that git add and git commit were called
+        calls = mock_run.call_args_list
+        add_call = calls[1][0][0]
+        commit_call = calls[2][0][0]
+
+        assert add_call == ["git", "add", "-A"]
+        assert commit_call == [
+            "git",
+            "commit",
+            "-m",
+            "FIXME: changes left in worktree",
+        ]
+
+        # Check warning message
+        msgs = [r.getMessage() for r in caplog.records]
+        assert any("Uncommitted changes found in worktree" in m for m in msgs)
+
+
+@pytest.mark.slow
 @patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"})
-@pytest.mark.parametrize("worktree_type", [Worktree, WorktreeOverlayFs])
+@pytest.mark.parametrize(
+    "worktree_type",
+    [
+        pytest.param(Worktree, id="worktree"),
+        pytest.param(
+            WorktreeOverlayFs,
+            id="overlayfs",
+            marks=pytest.mark.skipif(
+                not WorktreeOverlayFs.is_supported(),
+                reason="fuse-overlayfs or fusermount not available",
+            ),
+        ),
+    ],
+)
 class TestWorktreeIntegrationWithKeep:
     """Integration tests for Worktree and WorktreeOverlayFs with keep option."""
 
@@ -597,13 +616,15 @@ class TestWorktreeIntegrationWithKeep:
                 ["git", "add", "test.txt"],
                 cwd=worktree.worktree_dir,
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
             subprocess.run(
                 ["git", "commit", "-m", "Test commit"],
                 cwd=worktree.worktree_dir,
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
 
             worktree_dir = worktree.worktree_dir
@@ -654,13 +675,15 @@ class TestWorktreeIntegrationWithKeep:
                 ["git", "add", "test.txt"],
                 cwd=worktree.worktree_dir,
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
             subprocess.run(
                 ["git", "commit", "-m", "Test commit"],
                 cwd=worktree.worktree_dir,
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
 
             worktree_dir = worktree.worktree_dir
@@ -688,13 +711,15 @@ class TestWorktreeIntegrationWithKeep:
                 ["git", "add", "test.txt"],
                 cwd=worktree.worktree_dir,
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
             subprocess.run(
                 ["git", "commit", "-m", "Test commit"],
                 cwd=worktree.worktree_dir,
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
 
             branch = worktree.branch
@@ -704,7 +729,8 @@ class TestWorktreeIntegrationWithKeep:
             ["git", "rev-parse", "--verify", branch],
             cwd=real_git_repo,
             check=True,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
         assert result.returncode == 0
 
@@ -744,9 +770,9 @@ class TestWorktreeIntegrationWithKeep:
             branch = worktree.branch
 
         # Check that cleanup committed the changes
-        log_output = caplog.text
-        assert "Uncommitted changes found in worktree" in log_output
-        assert "committing them" in log_output
+        msgs = [r.getMessage() for r in caplog.records]
+        assert any("Uncommitted changes found in worktree" in m for m in msgs)
+        assert any("committing them" in m for m in msgs)
 
         # For Worktree, the branch is still in the worktree, check from there
         # For WorktreeOverlayFs, the branch is fetched to the main repo
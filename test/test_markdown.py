@@ -4,6 +4,7 @@
 """Tests for markdown parsing utilities."""
 
 import logging
+import os
 from pathlib import Path
 
 import pytest
@@ -25,17 +26,47 @@ def tmp_md_file(tmp_path):
     return _create_file
 
 
-def test_parse_frontmatter_simple(tmp_md_file):
-    """Test parsing simple frontmatter with single-line values."""
-    content = """---
+SIMPLE_CONTENT = """---
 description: A simple description
 author: John Doe
 ---
 
 # Content here
 """
-    md_file = tmp_md_file(content)
-    md = Markdown.from_file(md_file)
+
+NO_FRONTMATTER_CONTENT = """# Just a regular markdown file
+
+No frontmatter here.
+"""
+
+
+def _write_session_file(tmp_path_factory, content: str) -> Path:
+    md_file = tmp_path_factory.mktemp("md") / "test.md"
+    md_file.write_text(content)
+    return md_file
+
+
+@pytest.fixture(scope="session")
+def simple_md_file(tmp_path_factory):
+    """Markdown file with SIMPLE_CONTENT, shared by all tests. Do not modify."""
+    return _write_session_file(tmp_path_factory, SIMPLE_CONTENT)
+
+
+@pytest.fixture(scope="session")
+def no_frontmatter_md_file(tmp_path_factory):
+    """Markdown file with NO_FRONTMATTER_CONTENT, shared by all tests. Do not modify."""
+    return _write_session_file(tmp_path_factory, NO_FRONTMATTER_CONTENT)
+
+
+@pytest.fixture(scope="session")
+def empty_md_file(tmp_path_factory):
+    """Empty markdown file, shared by all tests. Do not modify."""
+    return _write_session_file(tmp_path_factory, "")
+
+
+def test_parse_frontmatter_simple(simple_md_file):
+    """Test parsing simple frontmatter with single-line values."""
+    md = Markdown.from_file(simple_md_file)
 
     assert md.frontmatter == {
         "description": "A simple description",
@@ -64,24 +95,17 @@ title: Short Title
     assert md.text == "\n# Content\n"
 
 
-def test_parse_frontmatter_no_frontmatter(tmp_md_file):
+def test_parse_frontmatter_no_frontmatter(no_frontmatter_md_file):
     """Test file without frontmatter returns empty dict."""
-    content = """# Just a regular markdown file
-
-No frontmatter here.
-"""
-    md_file = tmp_md_file(content)
-    md = Markdown.from_file(md_file)
+    md = Markdown.from_file(no_frontmatter_md_file)
 
     assert md.frontmatter == {}
-    assert md.text == content
+    assert md.text == NO_FRONTMATTER_CONTENT
 
 
-def test_parse_frontmatter_empty_file(tmp_md_file):
+def test_parse_frontmatter_empty_file(empty_md_file):
     """Test empty file returns empty dict."""
-    content = ""
-    md_file = tmp_md_file(content)
-    md = Markdown.from_file(md_file)
+    md = Markdown.from_file(empty_md_file)
 
     assert md.frontmatter == {}
     assert md.text == ""
@@ -215,19 +239,25 @@ tags: python, testing
     assert md.frontmatter["tags"] == "python, testing"
 
 
+def test_parse_frontmatter_file_modified(tmp_md_file):
+    """Test that a file rewritten with the same size and mtime is parsed again."""
+    md_file = tmp_md_file("---\ndescription: aaaa\n---\n")
+    st = md_file.stat()
+    assert Markdown.from_file(md_file).frontmatter == {"description": "aaaa"}
+
+    # Same length content and a pinned mtime, as on a filesystem with
+    # coarse timestamps
+    md_file.write_text("---\ndescription: bbbb\n---\n")
+    os.utime(md_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert Markdown.from_file(md_file).frontmatter == {"description": "bbbb"}
+
+
 # Tests for Markdown.from_string
 
 
 def test_markdown_from_string_simple():
     """Test Markdown.from_string with simple frontmatter."""
-    content = """---
-description: A simple description
-author: John Doe
----
-
-# Content here
-"""
-    md = Markdown.from_string(content)
+    md = Markdown.from_string(SIMPLE_CONTENT)
 
     assert md.frontmatter == {
         "description": "A simple description",
@@ -238,14 +268,10 @@ author: John Doe
 
 def test_markdown_from_string_no_frontmatter():
     """Test Markdown.from_string without frontmatter."""
-    content = """# Just a regular markdown file
-
-No frontmatter here.
-"""
-    md = Markdown.from_string(content)
+    md = Markdown.from_string(NO_FRONTMATTER_CONTENT)
 
     assert md.frontmatter == {}
-    assert md.text == content
+    assert md.text == NO_FRONTMATTER_CONTENT
 
 
 def test_markdown_from_string_multiline_value():
@@ -302,20 +328,34 @@ url: https://example.com:8080/path
     assert md.frontmatter["url"] == "https://example.com:8080/path"
 
 
+def test_markdown_from_string_repeated_parse_is_independent():
+    """Test that modifying a parsed Markdown does not affect later parses."""
+    content = """---
+description: A simple description
+---
+
+# Content here
+"""
+    md = Markdown.from_string(content)
+    md.frontmatter["description"] = "changed"
+    md.frontmatter["extra"] = "value"
+
+    md = Markdown.from_string(content)
+    assert md.frontmatter == {"description": "A simple description"}
+
+
 # Tests for MarkdownInstructions
 
 
-def test_markdown_instructions_no_frontmatter(tmp_md_file):
+def test_markdown_instructions_no_frontmatter(no_frontmatter_md_file):
     """Test MarkdownInstructions with no frontmatter."""
     from papagai.markdown import MarkdownInstructions
 
-    content = "# Just a regular markdown file\n\nNo frontmatter here."
-    md_file = tmp_md_file(content)
-    md = MarkdownInstructions.from_file(md_file)
+    md = MarkdownInstructions.from_file(no_frontmatter_md_file)
 
     assert md.description == ""
     assert md.tools == []
-    assert md.text == content
+    assert md.text == NO_FRONTMATTER_CONTENT
 
 
 def test_markdown_instructions_no_tools_key(tmp_md_file):
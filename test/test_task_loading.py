@@ -4,21 +4,100 @@
 """Tests for task loading from XDG_CONFIG_HOME."""
 
 import logging
+import os
+import stat
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import click
 import pytest
 from click.testing import CliRunner
 
 from papagai.cli import (
+    Context,
+    cmd_task,
     get_builtin_tasks_dir,
     get_xdg_task_dir,
     list_all_tasks,
     papagai,
 )
+from papagai.markdown import MarkdownInstructions
 
 logger = logging.getLogger("papagai.test")
 
+# Task file contents, format() with desc (and tools)
+_TASK_TMPL = "---\ndescription: {desc}\n---\n\nContent.\n"
+_TASK_TMPL_TOOLS = "---\ndescription: {desc}\ntools: {tools}\n---\n\nContent.\n"
+
+
+def run_task(task_name: str) -> int:
+    """
+    Run the 'task' command for task_name without going through click.
+
+    Calls the command's callback directly with a default context, use
+    this where a test only checks the return value and the mocks, not
+    the output.
+    """
+    with click.Context(cmd_task, obj=Context()):
+        return cmd_task.callback(
+            list_tasks=False, base_branch="HEAD", task_name=task_name
+        )
+
+
+def _wtask(path: Path, description: str) -> None:
+    """Write a minimal task file with the given description to path."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, _TASK_TMPL.format(desc=description).encode())
+    finally:
+        os.close(fd)
+
+
+def _task_names(output: str) -> set[str]:
+    """Return the set of task names in a task listing."""
+    return {
+        line.split(" ... ")[0].strip()
+        for line in output.splitlines()
+        if " ... " in line
+    }
+
+
+@pytest.fixture(scope="session")
+def builtin_tasks_dir():
+    """The built-in tasks directory, resolved once per session."""
+    return get_builtin_tasks_dir()
+
+
+@pytest.fixture(scope="session")
+def fake_builtin_tasks_dir(tmp_path_factory):
+    """A built-in tasks directory with only a generic/review task."""
+    tasks_dir = tmp_path_factory.mktemp("builtin-tasks")
+    (tasks_dir / "generic").mkdir()
+    _wtask(tasks_dir / "generic" / "review.md", "Review the code")
+    return tasks_dir
+
+
+@pytest.fixture
+def fake_builtin(fake_builtin_tasks_dir, monkeypatch):
+    """
+    Replace the built-in tasks with fake_builtin_tasks_dir.
+
+    For tests that list XDG tasks and don't care about the real
+    built-in tasks, so those don't need to be parsed every time.
+    """
+    monkeypatch.setattr(
+        "papagai.cli.get_builtin_tasks_dir", lambda: fake_builtin_tasks_dir
+    )
+    return fake_builtin_tasks_dir
+
+
+@pytest.fixture
+def mock_claude_run(monkeypatch):
+    """Replace claude_run with a mock that succeeds."""
+    mock = MagicMock(return_value=0)
+    monkeypatch.setattr("papagai.cli.claude_run", mock)
+    return mock
+
 
 class TestGetXdgTaskDir:
     """Tests for get_xdg_task_dir() function."""
@@ -53,6 +132,18 @@ class TestGetXdgTaskDir:
         expected = Path("") / "papagai" / "tasks"
         assert task_dir == expected
 
+    def test_get_xdg_task_dir_follows_env_changes(self, monkeypatch, tmp_path):
+        """Test get_xdg_task_dir is not stale after XDG_CONFIG_HOME changes."""
+        monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "first"))
+        assert get_xdg_task_dir() == tmp_path / "first" / "papagai" / "tasks"
+
+        monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "second"))
+        assert get_xdg_task_dir() == tmp_path / "second" / "papagai" / "tasks"
+
+        monkeypatch.delenv("XDG_CONFIG_HOME")
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        assert get_xdg_task_dir() == tmp_path / "home" / ".config" / "papagai" / "tasks"
+
     def test_get_xdg_task_dir_returns_path_object(self, monkeypatch, tmp_path):
         """Test get_xdg_task_dir returns a Path object."""
         xdg_config_home = tmp_path / "config"
@@ -78,33 +169,32 @@ class TestGetXdgTaskDir:
 class TestGetBuiltinTasksDir:
     """Tests for get_builtin_tasks_dir() function."""
 
-    def test_get_builtin_tasks_dir_returns_path(self):
+    def test_get_builtin_tasks_dir_returns_path(self, builtin_tasks_dir):
         """Test get_builtin_tasks_dir returns a Path object."""
-        tasks_dir = get_builtin_tasks_dir()
+        tasks_dir = builtin_tasks_dir
 
         assert isinstance(tasks_dir, Path)
 
-    def test_get_builtin_tasks_dir_exists(self):
+    def test_get_builtin_tasks_dir_exists(self, builtin_tasks_dir):
         """Test get_builtin_tasks_dir returns an existing directory."""
-        tasks_dir = get_builtin_tasks_dir()
+        tasks_dir = builtin_tasks_dir
 
-        assert tasks_dir.exists()
-        assert tasks_dir.is_dir()
+        # os.stat() raises FileNotFoundError if it doesn't exist
+        assert stat.S_ISDIR(os.stat(tasks_dir).st_mode)
 
-    def test_get_builtin_tasks_dir_has_tasks(self):
+    def test_get_builtin_tasks_dir_has_tasks(self, builtin_tasks_dir):
         """Test get_builtin_tasks_dir contains task files."""
-        tasks_dir = get_builtin_tasks_dir()
+        tasks_dir = builtin_tasks_dir
 
-        md_files = list(tasks_dir.glob("**/*.md"))
-        assert len(md_files) > 0
+        # Stop at the first match, we only care that there is one
+        assert next(tasks_dir.rglob("*.md"), None) is not None
 
-    def test_get_builtin_tasks_dir_structure(self):
+    def test_get_builtin_tasks_dir_structure(self, builtin_tasks_dir):
         """Test get_builtin_tasks_dir has expected structure."""
-        tasks_dir = get_builtin_tasks_dir()
+        tasks_dir = builtin_tasks_dir
 
         # Should have at least the python directory
-        assert (tasks_dir / "python").exists()
-        assert (tasks_dir / "python").is_dir()
+        assert stat.S_ISDIR(os.stat(tasks_dir / "python").st_mode)
 
 
 class TestListAllTasks:
@@ -117,80 +207,59 @@ class TestListAllTasks:
 
         return Context(dry_run=False, quiet=False, notify=False)
 
-    @pytest.fixture
-    def setup_xdg_tasks(self, tmp_path, monkeypatch):
-        """Set up a temporary XDG_CONFIG_HOME with task files."""
-        xdg_config_home = tmp_path / "config"
-        xdg_tasks_dir = xdg_config_home / "papagai" / "tasks"
-        xdg_tasks_dir.mkdir(parents=True)
-
-        monkeypatch.setenv("XDG_CONFIG_HOME", str(xdg_config_home))
-
-        return xdg_tasks_dir
-
     def test_list_all_tasks_shows_builtin_tasks(self, mock_ctx, capsys):
         """Test list_all_tasks shows built-in tasks."""
         exit_code = list_all_tasks(mock_ctx)
 
         assert exit_code == 0
         captured = capsys.readouterr()
+        names = _task_names(captured.out)
         # Should show at least the python/update-to-3.9 task
-        assert "python/update-to-3.9" in captured.out
+        assert "python/update-to-3.9" in names
 
-    def test_list_all_tasks_with_xdg_tasks(self, setup_xdg_tasks, mock_ctx, capsys):
+    def test_list_all_tasks_with_xdg_tasks(
+        self, fake_builtin, xdg_tasks_dir, mock_ctx, capsys
+    ):
         """Test list_all_tasks includes tasks from XDG_CONFIG_HOME."""
         # Create a custom task
-        custom_task = setup_xdg_tasks / "custom-task.md"
-        custom_task.write_text(
-            """---
-description: A custom user task
----
-
-Do something custom.
-"""
-        )
+        custom_task = xdg_tasks_dir / "custom-task.md"
+        custom_task.write_text(_TASK_TMPL.format(desc="A custom user task"))
 
         exit_code = list_all_tasks(mock_ctx)
 
         assert exit_code == 0
         captured = capsys.readouterr()
-        assert "custom-task" in captured.out
+        names = _task_names(captured.out)
+        assert "custom-task" in names
         assert "A custom user task" in captured.out
 
     def test_list_all_tasks_xdg_takes_precedence(
-        self, setup_xdg_tasks, mock_ctx, capsys
+        self, fake_builtin, xdg_tasks_dir, mock_ctx, capsys
     ):
         """Test XDG tasks are listed before built-in tasks."""
         # Create custom tasks
-        custom1 = setup_xdg_tasks / "aaa-first.md"
-        custom1.write_text(
-            """---
-description: Should appear first alphabetically
----
-
-Content.
-"""
-        )
+        custom1 = xdg_tasks_dir / "aaa-first.md"
+        custom1.write_text(_TASK_TMPL.format(desc="Should appear first alphabetically"))
 
         exit_code = list_all_tasks(mock_ctx)
 
         assert exit_code == 0
         captured = capsys.readouterr()
+        names = _task_names(captured.out)
         # Custom task should appear in the output
-        assert "aaa-first" in captured.out
+        assert "aaa-first" in names
 
-    def test_list_all_tasks_empty_xdg_directory(
-        self, setup_xdg_tasks, mock_ctx, capsys
-    ):
+    def test_list_all_tasks_empty_xdg_directory(self, xdg_tasks_ro, mock_ctx, capsys):
         """Test list_all_tasks works when XDG directory is empty."""
-        # setup_xdg_tasks creates the directory but no files
+        # xdg_tasks_ro has the directory but no files
 
         exit_code = list_all_tasks(mock_ctx)
 
         assert exit_code == 0
         captured = capsys.readouterr()
+        names = _task_names(captured.out)
         # Should still show built-in tasks
-        assert "python/update-to-3.9" in captured.out
+        assert "python/update-to-3.9" in names
 
     def test_list_all_tasks_xdg_directory_not_exists(
         self, monkeypatch, mock_ctx, capsys
@@ -203,39 +272,34 @@ Content.
 
         assert exit_code == 0
         captured = capsys.readouterr()
+        names = _task_names(captured.out)
         # Should still show built-in tasks
-        assert "python/update-to-3.9" in captured.out
+        assert "python/update-to-3.9" in names
 
     def test_list_all_tasks_with_subdirectories(
-        self, setup_xdg_tasks, mock_ctx, capsys
+        self, fake_builtin, xdg_tasks_dir, mock_ctx, capsys
     ):
         """Test list_all_tasks handles tasks in subdirectories."""
         # Create a subdirectory with a task
-        subdir = setup_xdg_tasks / "python"
+        subdir = xdg_tasks_dir / "python"
         subdir.mkdir()
         task = subdir / "format-code.md"
-        task.write_text(
-            """---
-description: Format Python code
----
-
-Format all Python files.
-"""
-        )
+        task.write_text(_TASK_TMPL.format(desc="Format Python code"))
 
         exit_code = list_all_tasks(mock_ctx)
 
         assert exit_code == 0
         captured = capsys.readouterr()
-        assert "python/format-code" in captured.out
+        names = _task_names(captured.out)
+        assert "python/format-code" in names
         assert "Format Python code" in captured.out
 
     def test_list_all_tasks_skips_tasks_without_description(
-        self, setup_xdg_tasks, mock_ctx, capsys
+        self, fake_builtin, xdg_tasks_dir, mock_ctx, capsys
     ):
         """Test list_all_tasks skips tasks without description."""
         # Create a task without description
-        no_desc_task = setup_xdg_tasks / "no-description.md"
+        no_desc_task = xdg_tasks_dir / "no-description.md"
         no_desc_task.write_text(
             """---
 tools: Bash
@@ -255,30 +319,35 @@ Do something.
         assert "no-description" in captured.err
 
     def test_list_all_tasks_handles_invalid_markdown(
-        self, setup_xdg_tasks, mock_ctx, capsys, caplog
+        self, fake_builtin, xdg_tasks_dir, mock_ctx, capsys
     ):
-        """Test list_all_tasks handles invalid markdown files gracefully."""
-        # Create an invalid markdown file (not parseable)
-        invalid_task = setup_xdg_tasks / "invalid.md"
-        # Create a file that will cause MarkdownInstructions.from_file to fail
-        # by making it unreadable (simulate permission error)
+        """Test list_all_tasks handles unreadable task files gracefully."""
+        invalid_task = xdg_tasks_dir / "invalid.md"
         invalid_task.write_text("Some content")
-        # Change permissions to make it unreadable
-        invalid_task.chmod(0o000)
 
-        try:
+        # Fail reading only this file, as if it had no read permissions
+        from_file = MarkdownInstructions.from_file
+
+        def fail_on_invalid(path):
+            if path == invalid_task:
+                raise PermissionError(f"Permission denied: '{path}'")
+            return from_file(path)
+
+        with patch(
+            "papagai.cli.MarkdownInstructions.from_file", side_effect=fail_on_invalid
+        ):
             exit_code = list_all_tasks(mock_ctx)
 
-            # Should still succeed (exit code 0 if there are other valid tasks)
-            assert exit_code in [0, 1]
-            captured = capsys.readouterr()
-            # Should show warning about failed parsing
-            assert "Warning" in captured.err or "Failed to parse" in captured.err
-        finally:
-            # Restore permissions for cleanup
-            invalid_task.chmod(0o644)
+        # The other tasks are still listed
+        assert exit_code == 0
+        captured = capsys.readouterr()
+        assert "generic/review" in _task_names(captured.out)
+        # Should show warning about failed parsing
+        assert f"Failed to parse {invalid_task}" in captured.err
 
-    def test_list_all_tasks_multiple_xdg_tasks(self, setup_xdg_tasks, mock_ctx, capsys):
+    def test_list_all_tasks_multiple_xdg_tasks(
+        self, fake_builtin, xdg_tasks_dir, mock_ctx, capsys
+    ):
         """Test list_all_tasks with multiple XDG tasks."""
         # Create multiple tasks
         tasks = [
@@ -288,47 +357,28 @@ Do something.
         ]
 
         for filename, description in tasks:
-            task_file = setup_xdg_tasks / filename
-            task_file.write_text(
-                f"""---
-description: {description}
----
-
-Task content.
-"""
-            )
+            _wtask(xdg_tasks_dir / filename, description)
 
         exit_code = list_all_tasks(mock_ctx)
 
         assert exit_code == 0
         captured = capsys.readouterr()
+        names = _task_names(captured.out)
         for filename, description in tasks:
             task_name = filename.replace(".md", "")
-            assert task_name in captured.out
+            assert task_name in names
             assert description in captured.out
 
-    def test_list_all_tasks_alignment(self, setup_xdg_tasks, mock_ctx, capsys):
+    def test_list_all_tasks_alignment(
+        self, fake_builtin, xdg_tasks_dir, mock_ctx, capsys
+    ):
         """Test list_all_tasks aligns task names and descriptions."""
         # Create tasks with different name lengths
-        short_task = setup_xdg_tasks / "a.md"
-        short_task.write_text(
-            """---
-description: Short name
----
+        short_task = xdg_tasks_dir / "a.md"
+        short_task.write_text(_TASK_TMPL.format(desc="Short name"))
 
-Content.
-"""
-        )
-
-        long_task = setup_xdg_tasks / "very-long-task-name.md"
-        long_task.write_text(
-            """---
-description: Long name
----
-
-Content.
-"""
-        )
+        long_task = xdg_tasks_dir / "very-long-task-name.md"
+        long_task.write_text(_TASK_TMPL.format(desc="Long name"))
 
         exit_code = list_all_tasks(mock_ctx)
 
@@ -338,6 +388,7 @@ Content.
         assert " ... " in captured.out
 
 
+@pytest.mark.usefixtures("mock_claude_run")
 class TestTaskCommandWithXdg:
     """Tests for 'task' command with XDG_CONFIG_HOME tasks."""
 
@@ -346,109 +397,71 @@ class TestTaskCommandWithXdg:
         """Create a CliRunner instance."""
         return CliRunner()
 
-    @pytest.fixture
-    def setup_xdg_tasks(self, tmp_path, monkeypatch):
-        """Set up a temporary XDG_CONFIG_HOME with task files."""
-        xdg_config_home = tmp_path / "config"
-        xdg_tasks_dir = xdg_config_home / "papagai" / "tasks"
-        xdg_tasks_dir.mkdir(parents=True)
-
-        monkeypatch.setenv("XDG_CONFIG_HOME", str(xdg_config_home))
-
-        return xdg_tasks_dir
-
-    def test_task_loads_from_xdg(self, runner, setup_xdg_tasks):
+    def test_task_loads_from_xdg(self, mock_claude_run, xdg_tasks_dir):
         """Test 'task' command loads tasks from XDG_CONFIG_HOME."""
         # Create a custom task
-        custom_task = setup_xdg_tasks / "custom-task.md"
+        custom_task = xdg_tasks_dir / "custom-task.md"
         custom_task.write_text(
-            """---
-description: A custom task
-tools: Bash(test:*)
----
-
-Do something custom.
-"""
+            _TASK_TMPL_TOOLS.format(desc="A custom task", tools="Bash(test:*)")
         )
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
-
-            result = runner.invoke(papagai, ["task", "custom-task"])
+        exit_code = run_task("custom-task")
 
-            # Should successfully load and execute the task
-            mock_claude_run.assert_called_once()
-            assert result.exit_code == 0
+        # Should successfully load and execute the task
+        mock_claude_run.assert_called_once()
+        assert exit_code == 0
 
-    def test_task_xdg_takes_precedence_over_builtin(self, runner, setup_xdg_tasks):
+    def test_task_xdg_takes_precedence_over_builtin(self, xdg_tasks_dir):
         """Test XDG tasks take precedence over built-in tasks with same name."""
         # Create a custom task with the same name as a built-in one
-        python_dir = setup_xdg_tasks / "python"
+        python_dir = xdg_tasks_dir / "python"
         python_dir.mkdir()
         custom_task = python_dir / "update-to-3.9.md"
         custom_task.write_text(
-            """---
-description: Custom Python update task
-tools: Bash(custom:*)
----
-
-This is my custom Python update.
-"""
+            _TASK_TMPL_TOOLS.format(
+                desc="Custom Python update task", tools="Bash(custom:*)"
+            )
         )
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            with patch("papagai.cli.MarkdownInstructions.from_file") as mock_from_file:
-                mock_instructions = MagicMock()
-                mock_instructions.text = "This is my custom Python update."
-                mock_from_file.return_value = mock_instructions
-                mock_claude_run.return_value = 0
+        with patch("papagai.cli.MarkdownInstructions.from_file") as mock_from_file:
+            mock_instructions = MagicMock()
+            mock_instructions.text = "This is my custom Python update."
+            mock_from_file.return_value = mock_instructions
+            exit_code = run_task("python/update-to-3.9")
 
-                result = runner.invoke(papagai, ["task", "python/update-to-3.9"])
+            # Should load the XDG version
+            mock_from_file.assert_called_once()
+            assert "custom python update" in custom_task.read_text().lower()
+            assert exit_code == 0
 
-                # Should load the XDG version
-                mock_from_file.assert_called_once()
-                assert "custom python update" in custom_task.read_text().lower()
-                assert result.exit_code == 0
-
-    def test_task_falls_back_to_builtin(self, runner, setup_xdg_tasks):
+    def test_task_falls_back_to_builtin(self, mock_claude_run, xdg_tasks_ro):
         """Test 'task' falls back to built-in tasks if not in XDG."""
         # Don't create any XDG tasks, just use built-in
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
-
-            result = runner.invoke(papagai, ["task", "python/update-to-3.9"])
+        exit_code = run_task("python/update-to-3.9")
 
-            # Should load the built-in task
-            mock_claude_run.assert_called_once()
-            assert result.exit_code == 0
+        # Should load the built-in task
+        mock_claude_run.assert_called_once()
+        assert exit_code == 0
 
-    def test_task_with_xdg_subdirectories(self, runner, setup_xdg_tasks):
+    def test_task_with_xdg_subdirectories(self, mock_claude_run, xdg_tasks_dir):
         """Test 'task' loads tasks from XDG subdirectories."""
-        # Create a subdirectory structure
-        subdir = setup_xdg_tasks / "python" / "linting"
-        subdir.mkdir(parents=True)
+        # Create a task in a subdirectory, deeper nesting is covered by
+        # test_task_with_complex_directory_structure
+        subdir = xdg_tasks_dir / "python-linting"
+        subdir.mkdir()
         task = subdir / "ruff.md"
         task.write_text(
-            """---
-description: Run ruff linter
-tools: Bash(ruff:*)
----
-
-Run ruff on all Python files.
-"""
+            _TASK_TMPL_TOOLS.format(desc="Run ruff linter", tools="Bash(ruff:*)")
         )
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
-
-            result = runner.invoke(papagai, ["task", "python/linting/ruff"])
+        exit_code = run_task("python-linting/ruff")
 
-            # Should successfully load the nested task
-            mock_claude_run.assert_called_once()
-            assert result.exit_code == 0
+        # Should successfully load the nested task
+        mock_claude_run.assert_called_once()
+        assert exit_code == 0
 
-    def test_task_with_nonexistent_xdg_task(self, runner, setup_xdg_tasks):
+    def test_task_with_nonexistent_xdg_task(self, runner, xdg_tasks_ro):
         """Test 'task' command with non-existent XDG task."""
         # Create XDG directory but no tasks
 
@@ -459,62 +472,47 @@ Run ruff on all Python files.
         # Note: Click runner doesn't propagate the return value as exit code
         # in the same way, so we just check for the error message
 
-    def test_task_list_with_xdg_tasks(self, runner, setup_xdg_tasks):
+    def test_task_list_with_xdg_tasks(self, fake_builtin, runner, xdg_tasks_dir):
         """Test 'task --list' includes XDG tasks."""
         # Create custom tasks
-        custom_task = setup_xdg_tasks / "my-task.md"
-        custom_task.write_text(
-            """---
-description: My custom task
----
-
-Content.
-"""
-        )
+        custom_task = xdg_tasks_dir / "my-task.md"
+        custom_task.write_text(_TASK_TMPL.format(desc="My custom task"))
 
         result = runner.invoke(papagai, ["task", "--list"])
 
         assert result.exit_code == 0
-        assert "my-task" in result.output
+        names = _task_names(result.output)
+        assert "my-task" in names
         assert "My custom task" in result.output
 
-    def test_task_with_xdg_invalid_permissions(self, runner, setup_xdg_tasks):
+    def test_task_with_xdg_invalid_permissions(
+        self, mock_claude_run, runner, xdg_tasks_dir
+    ):
         """Test 'task' handles permission errors gracefully."""
-        # Create a task file with invalid permissions
-        restricted_task = setup_xdg_tasks / "restricted.md"
-        restricted_task.write_text(
-            """---
-description: Restricted task
----
+        _wtask(xdg_tasks_dir / "restricted.md", "Restricted task")
 
-Content.
-"""
-        )
-        restricted_task.chmod(0o000)
-
-        try:
+        with patch(
+            "papagai.cli.MarkdownInstructions.from_file",
+            side_effect=PermissionError("Permission denied"),
+        ):
             result = runner.invoke(papagai, ["task", "restricted"])
 
-            # Should show error message about reading the file
-            assert "Error reading" in result.output or result.exit_code != 0
-        finally:
-            # Restore permissions for cleanup
-            restricted_task.chmod(0o644)
+        # Should show error message about reading the file
+        assert "Error reading" in result.output
+        mock_claude_run.assert_not_called()
 
-    def test_task_with_xdg_home_not_set(self, runner, monkeypatch):
+    def test_task_with_xdg_home_not_set(self, mock_claude_run, monkeypatch):
         """Test 'task' works when XDG_CONFIG_HOME is not set."""
         monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
-
-            result = runner.invoke(papagai, ["task", "python/update-to-3.9"])
+        exit_code = run_task("python/update-to-3.9")
 
-            # Should still work with built-in tasks
-            mock_claude_run.assert_called_once()
-            assert result.exit_code == 0
+        # Should still work with built-in tasks
+        mock_claude_run.assert_called_once()
+        assert exit_code == 0
 
 
+@pytest.mark.usefixtures("mock_claude_run")
 class TestTaskCommandIntegration:
     """Integration tests for task loading from both sources."""
 
@@ -523,146 +521,71 @@ class TestTaskCommandIntegration:
         """Create a CliRunner instance."""
         return CliRunner()
 
-    @pytest.fixture
-    def setup_complete_environment(self, tmp_path, monkeypatch):
-        """Set up complete environment with XDG and built-in tasks."""
-        xdg_config_home = tmp_path / "config"
-        xdg_tasks_dir = xdg_config_home / "papagai" / "tasks"
-        xdg_tasks_dir.mkdir(parents=True)
-
-        monkeypatch.setenv("XDG_CONFIG_HOME", str(xdg_config_home))
-
-        return {
-            "xdg_tasks_dir": xdg_tasks_dir,
-            "xdg_config_home": xdg_config_home,
-        }
-
-    def test_task_loading_priority_order(self, runner, setup_complete_environment):
+    def test_task_loading_priority_order(self, xdg_tasks_dir):
         """Test that tasks are loaded in correct priority order (XDG > built-in)."""
-        xdg_tasks = setup_complete_environment["xdg_tasks_dir"]
-
         # Create an XDG task that shadows a built-in one
-        python_dir = xdg_tasks / "python"
+        python_dir = xdg_tasks_dir / "python"
         python_dir.mkdir()
         xdg_python = python_dir / "update-to-3.9.md"
-        xdg_python.write_text(
-            """---
-description: XDG custom Python update
----
-
-XDG Python update content.
-"""
-        )
+        xdg_python.write_text(_TASK_TMPL.format(desc="XDG custom Python update"))
 
         # Create a unique XDG task
-        xdg_unique = xdg_tasks / "unique-task.md"
-        xdg_unique.write_text(
-            """---
-description: Unique XDG task
----
+        xdg_unique = xdg_tasks_dir / "unique-task.md"
+        xdg_unique.write_text(_TASK_TMPL.format(desc="Unique XDG task"))
 
-Unique content.
-"""
-        )
+        with patch("papagai.cli.MarkdownInstructions.from_file") as mock_from_file:
+            mock_from_file.return_value = MagicMock()
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            with patch("papagai.cli.MarkdownInstructions.from_file") as mock_from_file:
-                mock_instructions = MagicMock()
-                mock_from_file.return_value = mock_instructions
-                mock_claude_run.return_value = 0
-
-                # Test loading the shadowed task
-                result1 = runner.invoke(papagai, ["task", "python/update-to-3.9"])
-                assert result1.exit_code == 0
-
-                # Verify XDG version was loaded (not built-in)
-                called_path = mock_from_file.call_args[0][0]
-                assert called_path == xdg_python
-
-                # Reset mock
+            # The shadowed task must load the XDG version (not built-in)
+            for task_name, expected_path in [
+                ("python/update-to-3.9", xdg_python),
+                ("unique-task", xdg_unique),
+            ]:
                 mock_from_file.reset_mock()
+                exit_code = run_task(task_name)
+                assert exit_code == 0
+                assert mock_from_file.call_args[0][0] == expected_path
 
-                # Test loading the unique XDG task
-                result2 = runner.invoke(papagai, ["task", "unique-task"])
-                assert result2.exit_code == 0
-
-                called_path = mock_from_file.call_args[0][0]
-                assert called_path == xdg_unique
-
-    def test_task_list_shows_both_sources(self, runner, setup_complete_environment):
+    def test_task_list_shows_both_sources(self, runner, xdg_tasks_dir):
         """Test that task list shows tasks from both XDG and built-in."""
-        xdg_tasks = setup_complete_environment["xdg_tasks_dir"]
-
         # Create XDG tasks
-        xdg_task1 = xdg_tasks / "xdg-task-1.md"
-        xdg_task1.write_text(
-            """---
-description: First XDG task
----
-
-Content.
-"""
-        )
-
-        xdg_task2 = xdg_tasks / "xdg-task-2.md"
-        xdg_task2.write_text(
-            """---
-description: Second XDG task
----
-
-Content.
-"""
-        )
+        _wtask(xdg_tasks_dir / "xdg-task-1.md", "First XDG task")
+        _wtask(xdg_tasks_dir / "xdg-task-2.md", "Second XDG task")
 
         result = runner.invoke(papagai, ["task", "--list"])
 
         assert result.exit_code == 0
+        names = _task_names(result.output)
         # Should show XDG tasks
-        assert "xdg-task-1" in result.output
-        assert "xdg-task-2" in result.output
+        assert "xdg-task-1" in names
+        assert "xdg-task-2" in names
         # Should also show built-in tasks
-        assert "python/update-to-3.9" in result.output
+        assert "python/update-to-3.9" in names
 
-    def test_empty_xdg_directory_uses_builtins(
-        self, runner, setup_complete_environment
-    ):
+    def test_empty_xdg_directory_uses_builtins(self, mock_claude_run, xdg_tasks_ro):
         """Test that empty XDG directory doesn't prevent loading built-in tasks."""
         # XDG directory exists but is empty
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
+        exit_code = run_task("python/update-to-3.9")
 
-            result = runner.invoke(papagai, ["task", "python/update-to-3.9"])
-
-            # Should successfully load built-in task
-            mock_claude_run.assert_called_once()
-            assert result.exit_code == 0
+        # Should successfully load built-in task
+        mock_claude_run.assert_called_once()
+        assert exit_code == 0
 
     def test_task_with_complex_directory_structure(
-        self, runner, setup_complete_environment
+        self, mock_claude_run, xdg_tasks_dir
     ):
         """Test task loading with complex nested directory structures."""
-        xdg_tasks = setup_complete_environment["xdg_tasks_dir"]
-
-        # Create complex directory structure
-        nested_path = xdg_tasks / "lang" / "python" / "testing"
-        nested_path.mkdir(parents=True)
+        # This is the one test with a multi-level tree, keep the others flat
+        nested_path = xdg_tasks_dir / "lang" / "python" / "testing"
+        os.makedirs(nested_path, exist_ok=True)
 
         pytest_task = nested_path / "pytest.md"
         pytest_task.write_text(
-            """---
-description: Run pytest tests
-tools: Bash(pytest:*)
----
-
-Run pytest on all test files.
-"""
+            _TASK_TMPL_TOOLS.format(desc="Run pytest tests", tools="Bash(pytest:*)")
         )
 
-        with patch("papagai.cli.claude_run") as mock_claude_run:
-            mock_claude_run.return_value = 0
+        exit_code = run_task("lang/python/testing/pytest")
 
-            result = runner.invoke(papagai, ["task", "lang/python/testing/pytest"])
-
-            mock_claude_run.assert_called_once()
-            assert result.exit_code == 0
+        mock_claude_run.assert_called_once()
+        assert exit_code == 0
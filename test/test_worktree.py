@@ -3,10 +3,14 @@
 
 """Tests for worktree management utilities."""
 
+import itertools
 import logging
 import os
+import shutil
 import subprocess
-from pathlib import Path
+import types
+from collections import defaultdict
+from pathlib import Path, PurePosixPath
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -22,73 +26,220 @@ from papagai.worktree import (
 logger = logging.getLogger("papagai.test")
 
 
+# Looked up once at import, the tests that run real git are skipped without it
+_GIT = shutil.which("git")
+requires_git = pytest.mark.skipif(_GIT is None, reason="git not available")
+
+# The branch of mock_worktree, its worktree directory is at the same path
+# below the repository
+_TEMPLATE_BRANCH = "papagai/main-20250101-1200-abc123"
+_TEMPLATE_SUBPATH = PurePosixPath(_TEMPLATE_BRANCH)
+
+_OK = types.SimpleNamespace(returncode=0)
+_FAIL = types.SimpleNamespace(returncode=1)
+_REV_PARSED = types.SimpleNamespace(returncode=0, stdout="abc123\n")
+
+
+def _git(cwd: Path, *args: str) -> None:
+    """Run git with args in cwd, discarding its output."""
+    subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+class _RunRecorder:
+    """
+    A run_command side effect that records each call by its first three
+    argv elements, e.g. ("git", "add", "-A").
+
+    Calls return _OK unless results has an entry for their op.
+    """
+
+    def __init__(self, results: dict[tuple[str, ...], object] | None = None):
+        self.results = results or {}
+        self.calls: dict[tuple[str, ...], list[tuple[list[str], dict]]] = defaultdict(
+            list
+        )
+
+    def __call__(self, cmd, **kwargs):
+        op = tuple(cmd[:3])
+        self.calls[op].append((cmd, kwargs))
+        return self.results.get(op, _OK)
+
+    def by_op(self, op: tuple[str, ...]) -> list[tuple[list[str], dict]]:
+        """Return the (cmd, kwargs) of all calls for op, in call order."""
+        return self.calls.get(op, [])
+
+
+def _calls_for(mock_run: MagicMock, prog: str) -> list[list[str]]:
+    """Return the argv of all calls to mock_run that ran prog, in call order."""
+    return [
+        c.args[0]
+        for c in mock_run.call_args_list
+        if c.args and c.args[0] and c.args[0][0] == prog
+    ]
+
+
+def _mkfiles(root: Path, spec: dict[str, str | None]) -> None:
+    """
+    Create files below root from a {relative path: content} dict.
+
+    A content of None creates an empty directory instead of a file.
+    """
+    dirs = {
+        os.path.join(root, path)
+        if content is None
+        else os.path.dirname(os.path.join(root, path))
+        for path, content in spec.items()
+    }
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+    for path, content in spec.items():
+        if content is not None:
+            with open(os.path.join(root, path), "w") as f:
+                f.write(content)
+
+
+def _revs(repo_dir: Path, *refs: str) -> dict[str, str]:
+    """
+    Resolve refs to their commit SHAs with a single git rev-parse.
+
+    Fails if any of the refs does not exist.
+    """
+    result = subprocess.run(
+        ["git", "rev-parse", *refs],
+        cwd=repo_dir,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return dict(zip(refs, result.stdout.splitlines(), strict=True))
+
+
+def _branches(repo_dir: Path) -> dict[str, tuple[str, str]]:
+    """
+    Map all local branches to their commit SHA and message, with a
+    single git for-each-ref.
+    """
+    result = subprocess.run(
+        [
+            "git",
+            "for-each-ref",
+            "--format=%(refname:short)%00%(objectname)%00%(contents)%00",
+            "refs/heads",
+        ],
+        cwd=repo_dir,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    branches = {}
+    # Each record is terminated by the NUL from the format and a newline
+    for record in result.stdout.split("\0\n")[:-1]:
+        name, sha, message = record.split("\0")
+        branches[name] = (sha, message.strip())
+    return branches
+
+
 @pytest.fixture
 def mock_git_repo(tmp_path):
     """Create a mock git repository directory."""
-    repo_dir = tmp_path / "test-repo"
-    repo_dir.mkdir()
-    return repo_dir
+    return tmp_path
 
 
 @pytest.fixture
 def mock_worktree(mock_git_repo):
     """Create a mock Worktree instance."""
-    worktree_dir = mock_git_repo / "papagai" / "main-20250101-1200-abc123"
-    branch = "papagai/main-20250101-1200-abc123"
     return Worktree(
-        worktree_dir=worktree_dir,
-        branch=branch,
+        worktree_dir=mock_git_repo / _TEMPLATE_SUBPATH,
+        branch=_TEMPLATE_BRANCH,
         repo_dir=mock_git_repo,
     )
 
 
-@pytest.fixture
-def real_git_repo(tmp_path):
-    """Create a real git repository for integration tests."""
-    repo_dir = tmp_path / "test-repo"
-    repo_dir.mkdir()
+@pytest.fixture(scope="class", params=["main", "develop", "feature/test", "v1.0.0"])
+def branched_worktree(request, tmp_path_factory, run_command_patch):
+    """
+    A Worktree created from_branch() off each base branch, once per class.
 
-    # Initialize git repository
-    subprocess.run(
-        ["git", "init", "-b", "main"],
-        cwd=repo_dir,
-        check=True,
-        capture_output=True,
-    )
+    Returns a tuple of (base_branch, repo_dir, worktree, run_command calls).
+    """
+    base_branch = request.param
+    repo_dir = tmp_path_factory.mktemp("repo")
 
-    # Configure git user for commits
-    subprocess.run(
-        ["git", "config", "user.name", "Test User"],
-        cwd=repo_dir,
-        check=True,
-        capture_output=True,
+    run_command_patch.reset_mock(return_value=True, side_effect=True)
+    run_command_patch.return_value = _REV_PARSED
+    worktree = Worktree.from_branch(
+        repo_dir, base_branch, branch_prefix=f"{BRANCH_PREFIX}/"
     )
-    subprocess.run(
-        ["git", "config", "user.email", "test@example.com"],
-        cwd=repo_dir,
-        check=True,
-        capture_output=True,
+    return base_branch, repo_dir, worktree, list(run_command_patch.call_args_list)
+
+
+@pytest.fixture
+def mock_overlay_fs(mock_git_repo):
+    """Create a mock WorktreeOverlayFs instance with an existing mount directory."""
+    overlay_base_dir = mock_git_repo / "overlay"
+    mount_dir = overlay_base_dir / "mounted"
+    os.makedirs(mount_dir)
+    return WorktreeOverlayFs(
+        worktree_dir=mount_dir,
+        branch=_TEMPLATE_BRANCH,
+        repo_dir=mock_git_repo,
+        overlay_base_dir=overlay_base_dir,
+        mount_dir=mount_dir,
     )
 
-    # Create an initial commit
+
+@pytest.fixture
+def xdg_cache_home(monkeypatch):
+    """Point XDG_CACHE_HOME at /tmp/test-cache for the overlay tests."""
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/test-cache")
+
+
+@pytest.fixture(scope="session")
+def pristine_git_repo(tmp_path_factory):
+    """
+    Create a git repository with a single commit, once per session.
+
+    Tests must not use this directly, use real_git_repo for a copy.
+    """
+    repo_dir = tmp_path_factory.mktemp("pristine", numbered=False)
+
+    # Initialize the repository, configure the git user for commits and
+    # create an initial commit, all in one process. The empty template
+    # skips the sample hooks, fewer files for real_git_repo to copy.
     test_file = repo_dir / "README.md"
     test_file.write_text("# Test Repository\n")
     subprocess.run(
-        ["git", "add", "README.md"],
+        [
+            "sh",
+            "-c",
+            "git init -q --template= -b main"
+            " && git config user.name 'Test User'"
+            " && git config user.email test@example.com"
+            " && git add README.md"
+            " && git commit -q -m 'Initial commit'",
+        ],
         cwd=repo_dir,
         check=True,
-        capture_output=True,
-    )
-    subprocess.run(
-        ["git", "commit", "-m", "Initial commit"],
-        cwd=repo_dir,
-        check=True,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
 
     return repo_dir
 
 
+@pytest.fixture
+def real_git_repo(tmp_path, pristine_git_repo):
+    """Create a real git repository for integration tests, a copy of pristine_git_repo."""
+    shutil.copytree(pristine_git_repo, tmp_path, symlinks=True, dirs_exist_ok=True)
+    return tmp_path
+
+
 class TestWorktreeDataclass:
     """Tests for Worktree dataclass structure."""
 
@@ -114,89 +265,79 @@ class TestWorktreeDataclass:
         assert isinstance(mock_worktree.branch, str)
 
 
+@pytest.mark.usefixtures("mock_run")
 class TestFromBranch:
     """Tests for Worktree.from_branch() classmethod."""
 
-    @pytest.mark.parametrize(
-        "base_branch", ["main", "develop", "feature/test", "v1.0.0"]
-    )
-    def test_from_branch_creates_worktree(self, mock_git_repo, base_branch):
+    def test_from_branch_creates_worktree(self, branched_worktree):
         """Test from_branch creates a worktree for different base branches."""
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock(stdout="abc123\n")
-
-            worktree = Worktree.from_branch(
-                mock_git_repo, base_branch, branch_prefix=f"{BRANCH_PREFIX}/"
-            )
-
-            # Check worktree attributes
-            assert worktree.repo_dir == mock_git_repo
-            assert worktree.branch.startswith(f"{BRANCH_PREFIX}/{base_branch}")
-            assert str(worktree.worktree_dir).startswith(str(mock_git_repo))
-
-            # Verify git commands were called (rev-parse + worktree add)
-            assert mock_run.call_count == 2
-            # Last call should be the worktree add
-            call_args = mock_run.call_args
-            assert call_args[0][0][0] == "git"
-            assert call_args[0][0][1] == "worktree"
-            assert call_args[0][0][2] == "add"
-            assert base_branch in call_args[0][0]
+        base_branch, repo_dir, worktree, calls = branched_worktree
+
+        # Check worktree attributes
+        assert worktree.repo_dir == repo_dir
+        assert worktree.branch.startswith(f"{BRANCH_PREFIX}/{base_branch}")
+        assert str(worktree.worktree_dir).startswith(str(repo_dir))
+
+        # Verify git commands were called (rev-parse + worktree add)
+        assert len(calls) == 2
+        # Last call should be the worktree add
+        call_args = calls[-1]
+        assert call_args[0][0][0] == "git"
+        assert call_args[0][0][1] == "worktree"
+        assert call_args[0][0][2] == "add"
+        assert base_branch in call_args[0][0]
 
     def test_from_branch_creates_unique_branches(self, mock_git_repo):
         """Test from_branch creates unique branch names on each call."""
-        with patch("papagai.worktree.run_command"):
-            worktree1 = Worktree.from_branch(mock_git_repo, "main")
-            worktree2 = Worktree.from_branch(mock_git_repo, "main")
+        worktree1 = Worktree.from_branch(mock_git_repo, "main")
+        worktree2 = Worktree.from_branch(mock_git_repo, "main")
 
-            assert worktree1.branch != worktree2.branch
+        assert worktree1.branch != worktree2.branch
 
     def test_from_branch_branch_name_format(self, mock_git_repo):
         """Test that branch names follow the expected format."""
-        with patch("papagai.worktree.run_command"):
-            worktree = Worktree.from_branch(
-                mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-            )
+        worktree = Worktree.from_branch(
+            mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
+        )
 
-            # Branch should be: papagai/main-YYYYmmdd-HHMM-XXXXXXXX
-            parts = worktree.branch.split("/")
-            assert len(parts) == 2
-            assert parts[0] == BRANCH_PREFIX
+        # Branch should be: papagai/main-YYYYmmdd-HHMM-XXXXXXXX
+        parts = worktree.branch.split("/")
+        assert len(parts) == 2
+        assert parts[0] == BRANCH_PREFIX
 
-            # Second part should be: main-YYYYmmdd-HHMM-uuid
-            branch_parts = parts[1].split("-")
-            assert branch_parts[0] == "main"
-            assert len(branch_parts) >= 4  # base-YYYYmmdd-HHMM-uuid
+        # Second part should be: main-YYYYmmdd-HHMM-uuid
+        branch_parts = parts[1].split("-")
+        assert branch_parts[0] == "main"
+        assert len(branch_parts) >= 4  # base-YYYYmmdd-HHMM-uuid
 
-    def test_from_branch_git_command_parameters(self, mock_git_repo):
+    def test_from_branch_git_command_parameters(self, mock_run, mock_git_repo):
         """Test that git worktree command is called with correct parameters."""
-        with patch("papagai.worktree.run_command") as mock_run:
-            worktree = Worktree.from_branch(mock_git_repo, "develop")
+        worktree = Worktree.from_branch(mock_git_repo, "develop")
 
-            call_args = mock_run.call_args
-            git_cmd = call_args[0][0]
+        call_args = mock_run.call_args
+        git_cmd = call_args[0][0]
 
-            assert git_cmd[0] == "git"
-            assert git_cmd[1] == "worktree"
-            assert git_cmd[2] == "add"
-            assert "--quiet" in git_cmd
-            assert "-b" in git_cmd
-            assert worktree.branch in git_cmd
-            assert str(worktree.worktree_dir) in git_cmd
-            assert "develop" in git_cmd
+        assert git_cmd[0] == "git"
+        assert git_cmd[1] == "worktree"
+        assert git_cmd[2] == "add"
+        assert "--quiet" in git_cmd
+        assert "-b" in git_cmd
+        assert worktree.branch in git_cmd
+        assert str(worktree.worktree_dir) in git_cmd
+        assert "develop" in git_cmd
 
-            # Check cwd parameter
-            assert call_args[1]["cwd"] == mock_git_repo
+        # Check cwd parameter
+        assert call_args[1]["cwd"] == mock_git_repo
 
-    def test_from_branch_raises_on_git_error(self, mock_git_repo):
+    def test_from_branch_raises_on_git_error(self, mock_run, mock_git_repo):
         """Test from_branch raises CalledProcessError when git fails."""
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.side_effect = subprocess.CalledProcessError(1, "git")
+        mock_run.side_effect = subprocess.CalledProcessError(1, "git")
 
-            with pytest.raises(subprocess.CalledProcessError):
-                Worktree.from_branch(mock_git_repo, "main")
+        with pytest.raises(subprocess.CalledProcessError):
+            Worktree.from_branch(mock_git_repo, "main")
 
 
+@pytest.mark.usefixtures("mock_run")
 class TestContextManager:
     """Tests for Worktree context manager functionality."""
 
@@ -213,8 +354,7 @@ class TestContextManager:
 
     def test_context_manager_with_statement(self, mock_git_repo):
         """Test Worktree works correctly in with statement."""
-        with patch("papagai.worktree.run_command"):
-            worktree = Worktree.from_branch(mock_git_repo, "main")
+        worktree = Worktree.from_branch(mock_git_repo, "main")
 
         with patch.object(worktree, "_cleanup") as mock_cleanup:
             with worktree as wt:
@@ -223,8 +363,7 @@ class TestContextManager:
 
     def test_context_manager_cleanup_on_exception(self, mock_git_repo):
         """Test cleanup is called even when exception occurs in with block."""
-        with patch("papagai.worktree.run_command"):
-            worktree = Worktree.from_branch(mock_git_repo, "main")
+        worktree = Worktree.from_branch(mock_git_repo, "main")
 
         with patch.object(worktree, "_cleanup") as mock_cleanup:
             try:
@@ -235,289 +374,198 @@ class TestContextManager:
             mock_cleanup.assert_called_once()
 
 
+@pytest.mark.usefixtures("mock_run")
 class TestCleanup:
     """Tests for Worktree._cleanup() method."""
 
-    def test_cleanup_removes_clean_worktree(self, mock_worktree):
+    def test_cleanup_removes_clean_worktree(self, mock_run, mock_worktree):
         """Test cleanup removes worktree with no uncommitted changes."""
         # Create the worktree directory
         mock_worktree.worktree_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            # Mock git diff to succeed (no changes)
-            result = MagicMock()
-            result.returncode = 0
-            mock_run.return_value = result
+        # Mock git diff to succeed (no changes)
+        mock_run.return_value = _OK
 
-            mock_worktree._cleanup()
+        mock_worktree._cleanup()
 
-            # Should call:
-            # 1. git diff --quiet --exit-code
-            # 3. git branch -f papagai/latest <branch> (from repoint_latest_branch)
-            # 4. git worktree remove
-            assert mock_run.call_count == 3
-            calls = mock_run.call_args_list
+        # Should call:
+        # 1. git diff --quiet --exit-code
+        # 3. git branch -f papagai/latest <branch> (from repoint_latest_branch)
+        # 4. git worktree remove
+        assert mock_run.call_count == 3
+        calls = mock_run.call_args_list
 
-            assert calls[0][0][0][0] == "git"
-            assert calls[0][0][0][1] == "diff"
-            assert "--quiet" in calls[0][0][0]
+        assert calls[0][0][0][0] == "git"
+        assert calls[0][0][0][1] == "diff"
+        assert "--quiet" in calls[0][0][0]
 
-            assert calls[1][0][0][0] == "git"
-            assert calls[1][0][0][1] == "branch"
-            assert calls[1][0][0][2] == "-f"
-            assert calls[1][0][0][3] == LATEST_BRANCH
+        assert calls[1][0][0][0] == "git"
+        assert calls[1][0][0][1] == "branch"
+        assert calls[1][0][0][2] == "-f"
+        assert calls[1][0][0][3] == LATEST_BRANCH
 
-            assert calls[2][0][0][0] == "git"
-            assert calls[2][0][0][1] == "worktree"
-            assert calls[2][0][0][2] == "remove"
+        assert calls[2][0][0][0] == "git"
+        assert calls[2][0][0][1] == "worktree"
+        assert calls[2][0][0][2] == "remove"
 
-    def test_cleanup_commits_uncommitted_changes(self, mock_worktree, caplog):
+    def test_cleanup_commits_uncommitted_changes(self, mock_run, mock_worktree, caplog):
         """Test cleanup commits uncommitted changes with FIXME message."""
         mock_worktree.worktree_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            # Track which commands are being called
-            call_count = [0]
-
-            def run_side_effect(cmd, **kwargs):
-                call_count[0] += 1
-                # First call is git diff - return non-zero to indicate changes present
-                if call_count[0] == 1 and cmd[1] == "diff":
-                    result = MagicMock()
-                    result.returncode = 1
-                    return result
-                # All other calls succeed
-                return MagicMock()
+        # git diff returns non-zero to indicate changes present
+        recorder = _RunRecorder({("git", "diff", "--quiet"): _FAIL})
+        mock_run.side_effect = recorder
 
-            mock_run.side_effect = run_side_effect
-
-            with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
-                mock_worktree._cleanup()
-
-            # Should call:
-            # 1. git diff --quiet --exit-code (returns 1)
-            # 2. git add -A
-            # 3. git commit -m "FIXME: changes left in worktree"
-            # 4. git branch -f papagai/latest <branch>
-            # 5. git worktree remove
-            assert mock_run.call_count == 5
-
-            # Check that git add and git commit were called
-            calls = mock_run.call_args_list
-            add_call = calls[1][0][0]
-            commit_call = calls[2][0][0]
-
-            assert add_call == ["git", "add", "-A"]
-            assert commit_call == [
-                "git",
-                "commit",
-                "-m",
-                "FIXME: changes left in worktree",
-            ]
+        with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
+            mock_worktree._cleanup()
 
-            # Check warning message
-            log_output = caplog.text
-            assert "Uncommitted changes found in worktree" in log_output
-            assert "committing them" in log_output
+        # Should call:
+        # 1. git diff --quiet --exit-code (returns 1)
+        # 2. git add -A
+        # 3. git commit -m "FIXME: changes left in worktree"
+        # 4. git branch -f papagai/latest <branch>
+        # 5. git worktree remove
+        assert mock_run.call_count == 5
+
+        # Check that git add and git commit were called
+        [(add_call, _)] = recorder.by_op(("git", "add", "-A"))
+        [(commit_call, _)] = recorder.by_op(("git", "commit", "-m"))
+
+        assert add_call == ["git", "add", "-A"]
+        assert commit_call == [
+            "git",
+            "commit",
+            "-m",
+            "FIXME: changes left in worktree",
+        ]
+
+        # Check warning message
+        log_output = caplog.text
+        assert "Uncommitted changes found in worktree" in log_output
+        assert "committing them" in log_output
 
-    def test_cleanup_removes_worktree_directory(self, mock_worktree):
+    def test_cleanup_removes_worktree_directory(self, mock_run, mock_worktree):
         """Test cleanup removes worktree directory if it exists."""
         # Create worktree directory with a file
-        mock_worktree.worktree_dir.mkdir(parents=True)
-        test_file = mock_worktree.worktree_dir / "test.txt"
-        test_file.write_text("test content")
+        _mkfiles(mock_worktree.worktree_dir, {"test.txt": "test content"})
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
+        mock_run.return_value = _OK
 
-            mock_worktree._cleanup()
+        mock_worktree._cleanup()
 
-            # Directory should be removed
-            assert not mock_worktree.worktree_dir.exists()
+        # Directory should be removed
+        assert not mock_worktree.worktree_dir.exists()
 
-    def test_cleanup_removes_empty_parent_directories(self, mock_worktree):
+    def test_cleanup_removes_empty_parent_directories(self, mock_run, mock_worktree):
         """Test cleanup removes empty parent directories up to repo_dir."""
         # Create nested directory structure
+        _mkfiles(mock_worktree.repo_dir, {"a/b/c": None})
         nested_dir = mock_worktree.repo_dir / "a" / "b" / "c"
-        nested_dir.mkdir(parents=True)
 
         # Update worktree to use nested directory
         mock_worktree.worktree_dir = nested_dir
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
+        mock_run.return_value = _OK
 
-            mock_worktree._cleanup()
+        mock_worktree._cleanup()
 
-            # All empty parent directories should be removed
-            assert not (mock_worktree.repo_dir / "a").exists()
+        # All empty parent directories should be removed
+        assert not (mock_worktree.repo_dir / "a").exists()
 
-    def test_cleanup_preserves_non_empty_parent_directories(self, mock_worktree):
+    def test_cleanup_preserves_non_empty_parent_directories(
+        self, mock_run, mock_worktree
+    ):
         """Test cleanup preserves parent directories that contain other files."""
-        # Create nested directory structure
+        # Create a parent directory with a file and the worktree dir
+        _mkfiles(
+            mock_worktree.repo_dir,
+            {"parent/other.txt": "other content", "parent/worktree": None},
+        )
         parent_dir = mock_worktree.repo_dir / "parent"
-        parent_dir.mkdir()
-
-        # Add a file in parent directory
         other_file = parent_dir / "other.txt"
-        other_file.write_text("other content")
+        mock_worktree.worktree_dir = parent_dir / "worktree"
 
-        # Create worktree dir inside parent
-        worktree_dir = parent_dir / "worktree"
-        worktree_dir.mkdir()
-        mock_worktree.worktree_dir = worktree_dir
+        mock_run.return_value = _OK
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
-
-            mock_worktree._cleanup()
+        mock_worktree._cleanup()
 
-            # Parent directory should still exist (not empty)
-            assert parent_dir.exists()
-            assert other_file.exists()
+        # Parent directory should still exist (not empty)
+        assert parent_dir.exists()
+        assert other_file.exists()
 
-    def test_cleanup_handles_exceptions_gracefully(self, mock_worktree, caplog):
+    def test_cleanup_handles_exceptions_gracefully(
+        self, mock_run, mock_worktree, caplog
+    ):
         """Test cleanup handles exceptions without crashing."""
         with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.side_effect = Exception("Unexpected error")
+            mock_run.side_effect = Exception("Unexpected error")
 
-                # Should not raise, just log warning
-                mock_worktree._cleanup()
+            # Should not raise, just log warning
+            mock_worktree._cleanup()
 
-                log_output = caplog.text
-                assert "Error during cleanup" in log_output
+            log_output = caplog.text
+            assert "Error during cleanup" in log_output
 
-    def test_cleanup_git_worktree_remove_check_parameter(self, mock_worktree):
+    def test_cleanup_git_worktree_remove_check_parameter(self, mock_run, mock_worktree):
         """Test that git worktree remove is called with check=False."""
         mock_worktree.worktree_dir.mkdir(parents=True)
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
+        recorder = _RunRecorder()
+        mock_run.side_effect = recorder
 
-            mock_worktree._cleanup()
+        mock_worktree._cleanup()
 
-            # Find the git worktree remove call
-            calls = mock_run.call_args_list
-            remove_call = [c for c in calls if c[0][0][2] == "remove"][0]
+        # Find the git worktree remove call
+        [(_, remove_kwargs)] = recorder.by_op(("git", "worktree", "remove"))
 
-            # check should be False
-            assert remove_call[1]["check"] is False
+        # check should be False
+        assert remove_kwargs["check"] is False
 
 
 class TestUpdateLatestBranch:
     """Tests for repoint_latest_branch() function."""
 
+    @pytest.mark.slow
+    @requires_git
     def test_repoint_latest_branch_creates_new_branch(self, real_git_repo):
         """Test repoint_latest_branch creates papagai/latest when it doesn't exist."""
         # Create a test branch
         test_branch = "papagai/test-branch-123"
-        subprocess.run(
-            ["git", "branch", test_branch],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-        )
+        _git(real_git_repo, "branch", test_branch)
 
         # Update latest to point to test branch
         repoint_latest_branch(real_git_repo, test_branch)
 
-        # Verify latest branch exists
-        result = subprocess.run(
-            ["git", "rev-parse", "--verify", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-        assert result.returncode == 0
-
-        # Verify latest points to same commit as test branch
-        latest_commit = subprocess.run(
-            ["git", "rev-parse", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        test_commit = subprocess.run(
-            ["git", "rev-parse", test_branch],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        assert latest_commit == test_commit
+        # Verify latest exists and points to same commit as test branch
+        revs = _revs(real_git_repo, LATEST_BRANCH, test_branch)
+        assert revs[LATEST_BRANCH] == revs[test_branch]
 
+    @pytest.mark.slow
+    @requires_git
     def test_repoint_latest_branch_updates_existing_branch(self, real_git_repo):
         """Test repoint_latest_branch updates papagai/latest when it already exists."""
         # Create first test branch and set latest to it
         branch1 = "papagai/branch-1"
-        subprocess.run(
-            ["git", "branch", branch1],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-        )
+        _git(real_git_repo, "branch", branch1)
         repoint_latest_branch(real_git_repo, branch1)
 
         # Create a new commit
         test_file = real_git_repo / "test.txt"
         test_file.write_text("new content\n")
-        subprocess.run(
-            ["git", "add", "test.txt"],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-        )
-        subprocess.run(
-            ["git", "commit", "-m", "Add test file"],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-        )
+        _git(real_git_repo, "add", "test.txt")
+        _git(real_git_repo, "commit", "-m", "Add test file")
 
         # Create second test branch from new commit
         branch2 = "papagai/branch-2"
-        subprocess.run(
-            ["git", "branch", branch2],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-        )
+        _git(real_git_repo, "branch", branch2)
 
         # Update latest to point to second branch
         repoint_latest_branch(real_git_repo, branch2)
 
         # Verify latest now points to branch2's commit
-        latest_commit = subprocess.run(
-            ["git", "rev-parse", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        branch2_commit = subprocess.run(
-            ["git", "rev-parse", branch2],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        assert latest_commit == branch2_commit
-        assert (
-            latest_commit
-            != subprocess.run(
-                ["git", "rev-parse", branch1],
-                cwd=real_git_repo,
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
-        )
+        revs = _revs(real_git_repo, LATEST_BRANCH, branch1, branch2)
+        assert revs[LATEST_BRANCH] == revs[branch2]
+        assert revs[LATEST_BRANCH] != revs[branch1]
 
     def test_repoint_latest_branch_with_mocked_commands(self, mock_git_repo):
         """Test repoint_latest_branch calls git commands correctly."""
@@ -550,7 +598,7 @@ class TestUpdateLatestBranch:
                 def side_effect(cmd, **kwargs):
                     if cmd[0] == "git" and cmd[1] == "branch" and len(cmd) == 5:
                         raise subprocess.CalledProcessError(1, "git")
-                    return MagicMock()
+                    return _OK
 
                 mock_run.side_effect = side_effect
 
@@ -562,67 +610,103 @@ class TestUpdateLatestBranch:
                 assert LATEST_BRANCH in log_output
 
 
+@pytest.fixture(scope="session")
+def pristine_head(pristine_git_repo):
+    """The SHA of main in pristine_git_repo."""
+    return _revs(pristine_git_repo, "main")["main"]
+
+
+def _add_worktree(worktree_type, repo_dir: Path, base_commit: str, name: str):
+    """
+    Create a worktree_type worktree off main in repo_dir.
+
+    A plain Worktree is set up with a single git worktree add instead of
+    going through from_branch(), for tests that are only about cleanup. An
+    overlay worktree needs its mount and still uses from_branch().
+    """
+    if worktree_type is not Worktree:
+        return worktree_type.from_branch(
+            repo_dir, "main", branch_prefix=f"{BRANCH_PREFIX}/"
+        )
+
+    branch = f"{BRANCH_PREFIX}/main-{name}"
+    worktree_dir = repo_dir / branch
+    _git(repo_dir, "worktree", "add", "--quiet", "-b", branch, str(worktree_dir))
+    return Worktree(
+        worktree_dir=worktree_dir,
+        branch=branch,
+        repo_dir=repo_dir,
+        base_commit=base_commit,
+    )
+
+
+@pytest.fixture
+def worktree_factory(real_git_repo, pristine_head, worktree_type):
+    """Return a function that adds a new worktree_type worktree to real_git_repo."""
+    names = itertools.count()
+
+    def make():
+        return _add_worktree(
+            worktree_type, real_git_repo, pristine_head, str(next(names))
+        )
+
+    return make
+
+
+@pytest.fixture(scope="class")
+def cleaned_worktree(tmp_path_factory, pristine_git_repo, pristine_head, worktree_type):
+    """
+    A worktree_type worktree with one commit that has been cleaned up, once
+    per class.
+
+    The repository is shared between tests, tests must not modify it.
+    """
+    repo_dir = tmp_path_factory.mktemp("cleaned") / "test-repo"
+    shutil.copytree(pristine_git_repo, repo_dir, symlinks=True)
+
+    # A patch.dict on the test class only applies to its test methods
+    with (
+        patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"}),
+        _add_worktree(worktree_type, repo_dir, pristine_head, "cleaned") as worktree,
+    ):
+        # Make a commit so cleanup proceeds
+        test_file = worktree.worktree_dir / "test.txt"
+        test_file.write_text("test content\n")
+        _git(worktree.worktree_dir, "add", "test.txt")
+        _git(worktree.worktree_dir, "commit", "-m", "Test commit")
+
+    return worktree
+
+
+@pytest.mark.slow
+@requires_git
 @patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"})
-@pytest.mark.parametrize("worktree_type", [Worktree, WorktreeOverlayFs])
+@pytest.mark.parametrize("worktree_type", [Worktree, WorktreeOverlayFs], scope="class")
 class TestWorktreeLatestBranchIntegration:
     """Integration tests for papagai/latest branch with Worktree."""
 
-    def test_worktree_cleanup_creates_latest_branch(self, real_git_repo, worktree_type):
+    def test_worktree_cleanup_creates_latest_branch(self, cleaned_worktree):
         """Test Worktree cleanup creates papagai/latest branch."""
-        with worktree_type.from_branch(
-            real_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-        ) as worktree:
-            # Make a commit so cleanup proceeds
-            test_file = worktree.worktree_dir / "test.txt"
-            test_file.write_text("test content\n")
-            subprocess.run(
-                ["git", "add", "test.txt"],
-                cwd=worktree.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
-            subprocess.run(
-                ["git", "commit", "-m", "Test commit"],
-                cwd=worktree.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
+        # After cleanup, papagai/latest should exist and point to the
+        # worktree branch
+        revs = _revs(cleaned_worktree.repo_dir, LATEST_BRANCH, cleaned_worktree.branch)
+        assert revs[LATEST_BRANCH] == revs[cleaned_worktree.branch]
 
-        # After cleanup, papagai/latest should exist
-        result = subprocess.run(
-            ["git", "rev-parse", "--verify", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-        )
-        assert result.returncode == 0
-
-        # Verify latest points to the worktree branch
-        latest_commit = subprocess.run(
-            ["git", "rev-parse", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        worktree_commit = subprocess.run(
-            ["git", "rev-parse", worktree.branch],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        assert latest_commit == worktree_commit
+    def test_worktree_cleanup_keeps_branch_commit(self, cleaned_worktree):
+        """Test the commit made in the worktree is on its branch after cleanup."""
+        branches = _branches(cleaned_worktree.repo_dir)
+        _, message = branches[cleaned_worktree.branch]
+        assert message == "Test commit"
+
+    def test_worktree_cleanup_removes_worktree_directory(self, cleaned_worktree):
+        """Test Worktree cleanup removes the worktree directory."""
+        assert not cleaned_worktree.worktree_dir.exists()
 
     def test_worktree_cleanup_commits_uncommitted_changes(
-        self, real_git_repo, caplog, worktree_type
+        self, real_git_repo, caplog, worktree_factory
     ):
         """Test Worktree cleanup commits uncommitted changes with FIXME message."""
-        worktree = worktree_type.from_branch(
-            real_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-        )
+        worktree = worktree_factory()
         with caplog.at_level(logging.WARNING, logger="papagai.worktree"), worktree:
             # Create uncommitted changes by modifying a tracked file
             readme_file = worktree.worktree_dir / "README.md"
@@ -634,138 +718,61 @@ class TestWorktreeLatestBranchIntegration:
         assert "Uncommitted changes found in worktree" in log_output
         assert "committing them" in log_output
 
-        # Verify the branch exists and has the FIXME commit
-        result = subprocess.run(
-            ["git", "log", "-1", "--pretty=%B", worktree.branch],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-        commit_message = result.stdout.strip()
-        assert commit_message == "FIXME: changes left in worktree"
-
-        # Verify latest was updated to point to the new branch
-        latest_commit = subprocess.run(
-            ["git", "rev-parse", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        worktree_commit = subprocess.run(
-            ["git", "rev-parse", worktree.branch],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        assert latest_commit == worktree_commit
+        # Verify the branch exists and has the FIXME commit, and latest
+        # was updated to point to the new branch
+        branches = _branches(real_git_repo)
+        sha, message = branches[worktree.branch]
+        assert message == "FIXME: changes left in worktree"
+        assert branches[LATEST_BRANCH] == (sha, message)
 
     def test_worktree_updates_latest_to_newest_branch(
-        self, real_git_repo, worktree_type
+        self, real_git_repo, worktree_factory
     ):
         """Test multiple worktree cleanups update latest to newest branch."""
         branches = []
 
         # Create and cleanup first worktree
-        with worktree_type.from_branch(
-            real_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-        ) as worktree1:
+        with worktree_factory() as worktree1:
             branches.append(worktree1.branch)
             test_file = worktree1.worktree_dir / "file1.txt"
             test_file.write_text("content 1\n")
-            subprocess.run(
-                ["git", "add", "file1.txt"],
-                cwd=worktree1.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
-            subprocess.run(
-                ["git", "commit", "-m", "Commit 1"],
-                cwd=worktree1.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
+            _git(worktree1.worktree_dir, "add", "file1.txt")
+            _git(worktree1.worktree_dir, "commit", "-m", "Commit 1")
 
         # Verify latest points to first branch
-        latest_commit = subprocess.run(
-            ["git", "rev-parse", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        branch1_commit = subprocess.run(
-            ["git", "rev-parse", branches[0]],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        assert latest_commit == branch1_commit
+        revs = _revs(real_git_repo, LATEST_BRANCH, branches[0])
+        assert revs[LATEST_BRANCH] == revs[branches[0]]
 
         # Create and cleanup second worktree
-        with worktree_type.from_branch(
-            real_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-        ) as worktree2:
+        with worktree_factory() as worktree2:
             branches.append(worktree2.branch)
             test_file = worktree2.worktree_dir / "file2.txt"
             test_file.write_text("content 2\n")
-            subprocess.run(
-                ["git", "add", "file2.txt"],
-                cwd=worktree2.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
-            subprocess.run(
-                ["git", "commit", "-m", "Commit 2"],
-                cwd=worktree2.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
+            _git(worktree2.worktree_dir, "add", "file2.txt")
+            _git(worktree2.worktree_dir, "commit", "-m", "Commit 2")
 
         # Verify latest now points to second branch
-        latest_commit = subprocess.run(
-            ["git", "rev-parse", LATEST_BRANCH],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        branch2_commit = subprocess.run(
-            ["git", "rev-parse", branches[1]],
-            cwd=real_git_repo,
-            check=True,
-            capture_output=True,
-            text=True,
-        ).stdout.strip()
-
-        assert latest_commit == branch2_commit
+        revs = _revs(real_git_repo, LATEST_BRANCH, branches[1])
+        assert revs[LATEST_BRANCH] == revs[branches[1]]
 
 
+@pytest.mark.usefixtures("mock_run")
 class TestIntegration:
     """Integration tests for Worktree."""
 
-    def test_full_workflow_with_context_manager(self, mock_git_repo):
+    def test_full_workflow_with_context_manager(self, mock_run, mock_git_repo):
         """Test complete workflow: create, use, cleanup."""
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
+        mock_run.return_value = MagicMock()
 
-            with Worktree.from_branch(
-                mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-            ) as worktree:
-                # Verify worktree was created
-                assert worktree.branch.startswith(f"{BRANCH_PREFIX}/main")
-                assert worktree.repo_dir == mock_git_repo
+        with Worktree.from_branch(
+            mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
+        ) as worktree:
+            # Verify worktree was created
+            assert worktree.branch.startswith(f"{BRANCH_PREFIX}/main")
+            assert worktree.repo_dir == mock_git_repo
 
-            # Verify cleanup was called (git diff + git worktree remove)
-            assert mock_run.call_count >= 2
+        # Verify cleanup was called (git diff + git worktree remove)
+        assert mock_run.call_count >= 2
 
 
 class TestHasCommits:
@@ -818,6 +825,8 @@ class TestHasCommits:
             assert worktree.has_commits() is True
 
 
+@pytest.mark.slow
+@requires_git
 @patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"})
 @pytest.mark.parametrize("worktree_type", [Worktree, WorktreeOverlayFs])
 class TestHasCommitsIntegration:
@@ -850,18 +859,8 @@ class TestHasCommitsIntegration:
             # Make a commit
             test_file = worktree.worktree_dir / "new_file.txt"
             test_file.write_text("new content\n")
-            subprocess.run(
-                ["git", "add", "new_file.txt"],
-                cwd=worktree.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
-            subprocess.run(
-                ["git", "commit", "-m", "Test commit"],
-                cwd=worktree.worktree_dir,
-                check=True,
-                capture_output=True,
-            )
+            _git(worktree.worktree_dir, "add", "new_file.txt")
+            _git(worktree.worktree_dir, "commit", "-m", "Test commit")
         # After cleanup, check the worktree object
         wt = Worktree(
             worktree_dir=real_git_repo / "dummy",
@@ -922,414 +921,301 @@ class TestWorktreeOverlayFsDataclass:
         assert overlay_fs.mount_dir is None
 
 
-@patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"})
+@pytest.mark.usefixtures("mock_run", "xdg_cache_home")
 class TestOverlayFsFromBranch:
     """Tests for WorktreeOverlayFs.from_branch() classmethod."""
 
-    def test_from_branch_creates_cache_directory_structure(self, mock_git_repo):
+    def test_from_branch_creates_cache_directory_structure(self, mock_run, tmp_path):
         """Test from_branch creates proper directory structure in cache."""
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
+        repo_dir = tmp_path / "test-repo"
+        repo_dir.mkdir()
+        mock_run.return_value = MagicMock()
 
-            overlay_fs = WorktreeOverlayFs.from_branch(
-                mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-            )
+        overlay_fs = WorktreeOverlayFs.from_branch(
+            repo_dir, "main", branch_prefix=f"{BRANCH_PREFIX}/"
+        )
 
-            # Check directory structure was created
-            assert overlay_fs.overlay_base_dir.parent.name == "test-repo"
-            assert str(overlay_fs.overlay_base_dir).startswith(
-                "/tmp/test-cache/papagai/"
-            )
+        # Check directory structure was created
+        assert overlay_fs.overlay_base_dir.parent.name == "test-repo"
+        assert str(overlay_fs.overlay_base_dir).startswith("/tmp/test-cache/papagai/")
 
     @patch.dict(os.environ, {}, clear=True)
     def test_from_branch_uses_home_cache_when_xdg_not_set(
-        self, mock_git_repo, tmp_path
+        self, mock_run, mock_git_repo, tmp_path
     ):
         """Test from_branch falls back to ~/.cache when XDG_CACHE_HOME not set."""
         # Remove XDG_CACHE_HOME if it exists
         os.environ.pop("XDG_CACHE_HOME", None)
 
         with patch.dict(os.environ, {"HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
+            mock_run.return_value = MagicMock()
 
-                overlay_fs = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+            overlay_fs = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
 
-                # Should use ~/.cache
-                expected_prefix = str(Path.home() / ".cache" / "papagai")
-                assert str(overlay_fs.overlay_base_dir).startswith(expected_prefix)
+            # Should use ~/.cache
+            expected_prefix = str(Path.home() / ".cache" / "papagai")
+            assert str(overlay_fs.overlay_base_dir).startswith(expected_prefix)
 
-    def test_from_branch_creates_overlay_subdirectories(self, mock_git_repo, tmp_path):
-        """Test from_branch creates upperdir, workdir, and mounted subdirectories."""
+    def test_from_branch_sets_up_mounted_overlay(
+        self, mock_run, mock_git_repo, tmp_path
+    ):
+        """
+        Test from_branch creates the overlay directories, mounts them and
+        creates the branch in the mount.
+
+        from_branch() runs once and its result is checked group by group.
+        """
         with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
+            mock_run.return_value = _REV_PARSED
 
-                overlay_fs = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+            overlay_fs = WorktreeOverlayFs.from_branch(
+                mock_git_repo, "develop", branch_prefix=f"{BRANCH_PREFIX}/"
+            )
 
-                # Check subdirectories were created
-                assert (overlay_fs.overlay_base_dir / "upperdir").exists()
-                assert (overlay_fs.overlay_base_dir / "workdir").exists()
-                assert (overlay_fs.overlay_base_dir / "mounted").exists()
+        # --- overlay subdirectories: upperdir, workdir and mounted ---
+        assert (overlay_fs.overlay_base_dir / "upperdir").exists()
+        assert (overlay_fs.overlay_base_dir / "workdir").exists()
+        assert (overlay_fs.overlay_base_dir / "mounted").exists()
 
-    def test_from_branch_mounts_with_fuse_overlayfs(self, mock_git_repo, tmp_path):
-        """Test from_branch calls fuse-overlayfs with correct parameters."""
-        with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
+        # --- fuse-overlayfs is called with the right parameters ---
+        fuse_calls = _calls_for(mock_run, "fuse-overlayfs")
+        assert len(fuse_calls) == 1
 
-                overlay_fs = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+        fuse_cmd = fuse_calls[0]
+        assert fuse_cmd[0] == "fuse-overlayfs"
+        assert fuse_cmd[1] == "-o"
 
-                # Find the fuse-overlayfs call
-                fuse_calls = [
-                    c for c in mock_run.call_args_list if c[0][0][0] == "fuse-overlayfs"
-                ]
-                assert len(fuse_calls) == 1
+        mount_opts = fuse_cmd[2]
+        assert f"lowerdir={mock_git_repo}" in mount_opts
+        assert "upperdir=" in mount_opts
+        assert "workdir=" in mount_opts
 
-                fuse_cmd = fuse_calls[0][0][0]
-                assert fuse_cmd[0] == "fuse-overlayfs"
-                assert fuse_cmd[1] == "-o"
+        assert fuse_cmd[3] == str(overlay_fs.mount_dir)
 
-                # Check mount options
-                mount_opts = fuse_cmd[2]
-                assert f"lowerdir={mock_git_repo}" in mount_opts
-                assert "upperdir=" in mount_opts
-                assert "workdir=" in mount_opts
+        # --- git branch is created in the mount (skip the rev-parse call) ---
+        git_calls = [
+            argv for argv in _calls_for(mock_run, "git") if argv[1] == "checkout"
+        ]
+        assert len(git_calls) == 1
 
-                # Check mount point
-                assert fuse_cmd[3] == str(overlay_fs.mount_dir)
+        git_cmd = git_calls[0]
+        assert git_cmd == ["git", "checkout", "-fb", overlay_fs.branch, "develop"]
+        mock_run.assert_any_call(git_cmd, cwd=overlay_fs.mount_dir)
 
-    def test_from_branch_creates_git_branch_in_mount(self, mock_git_repo, tmp_path):
-        """Test from_branch creates a git branch in the mounted directory."""
-        with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
-
-                overlay_fs = WorktreeOverlayFs.from_branch(
-                    mock_git_repo, "develop", branch_prefix=f"{BRANCH_PREFIX}/"
-                )
-
-                # Find the git checkout call (skip the rev-parse call)
-                git_calls = [
-                    c
-                    for c in mock_run.call_args_list
-                    if c[0][0][0] == "git" and c[0][0][1] == "checkout"
-                ]
-                assert len(git_calls) == 1
-
-                git_cmd = git_calls[0][0][0]
-                assert git_cmd[0] == "git"
-                assert git_cmd[1] == "checkout"
-                assert git_cmd[2] == "-fb"
-                assert git_cmd[3] == overlay_fs.branch
-                assert git_cmd[4] == "develop"
-
-                # Check cwd is the mount directory
-                assert git_calls[0][1]["cwd"] == overlay_fs.mount_dir
-
-    def test_from_branch_sets_worktree_dir_to_mounted(self, mock_git_repo, tmp_path):
-        """Test from_branch sets worktree_dir to the mounted directory."""
-        with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
+        # --- worktree_dir is the mounted directory ---
+        assert overlay_fs.worktree_dir == overlay_fs.mount_dir
+        assert overlay_fs.worktree_dir.name == "mounted"
 
-                overlay_fs = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+        # --- branch name uses the same scheme as Worktree ---
+        # Branch should be: papagai/develop-YYYYmmdd-HHMM-XXXXXXXX
+        parts = overlay_fs.branch.split("/")
+        assert len(parts) == 2
+        assert parts[0] == BRANCH_PREFIX
 
-                assert overlay_fs.worktree_dir == overlay_fs.mount_dir
-                assert overlay_fs.worktree_dir.name == "mounted"
+        branch_parts = parts[1].split("-")
+        assert branch_parts[0] == "develop"
+        assert len(branch_parts) >= 4
 
-    def test_from_branch_uses_same_naming_scheme_as_worktree(
-        self, mock_git_repo, tmp_path
+    def test_from_branch_cleanup_on_mount_failure(
+        self, mock_run, mock_git_repo, tmp_path
     ):
-        """Test from_branch generates branch names using the same scheme as Worktree."""
+        """Test from_branch cleans up directories if mount fails."""
         with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
+            # Make fuse-overlayfs fail, but rev-parse succeed
+            def run_side_effect(cmd, **kwargs):
+                if cmd[0] == "fuse-overlayfs":
+                    raise subprocess.CalledProcessError(1, "fuse-overlayfs")
+                return _REV_PARSED
 
-                overlay_fs = WorktreeOverlayFs.from_branch(
-                    mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-                )
+            mock_run.side_effect = run_side_effect
 
-                # Branch should be: papagai/main-YYYYmmdd-HHMM-XXXXXXXX
-                parts = overlay_fs.branch.split("/")
-                assert len(parts) == 2
-                assert parts[0] == BRANCH_PREFIX
+            with pytest.raises(
+                RuntimeError, match="Failed to mount overlay filesystem"
+            ):
+                WorktreeOverlayFs.from_branch(mock_git_repo, "main")
 
-                # Second part should be: main-YYYYmmdd-HHMM-uuid
-                branch_parts = parts[1].split("-")
-                assert branch_parts[0] == "main"
-                assert len(branch_parts) >= 4
+            # Directory should be cleaned up
+            papagai_dir = tmp_path / "papagai" / mock_git_repo.name
+            if papagai_dir.exists():
+                # If directory exists, it should be empty
+                assert len(list(papagai_dir.iterdir())) == 0
 
-    def test_from_branch_cleanup_on_mount_failure(self, mock_git_repo, tmp_path):
-        """Test from_branch cleans up directories if mount fails."""
+    def test_from_branch_cleanup_on_git_branch_failure(
+        self, mock_run, mock_git_repo, tmp_path
+    ):
+        """Test from_branch unmounts and cleans up if git branch creation fails."""
         with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                # Make fuse-overlayfs fail, but rev-parse succeed
+            with patch(
+                "papagai.worktree.WorktreeOverlayFs.get_fusermount_binary",
+                return_value="fusermount",
+            ):
+                # Make git checkout fail, but fuse-overlayfs and rev-parse succeed
                 def run_side_effect(cmd, **kwargs):
-                    if cmd[0] == "fuse-overlayfs":
-                        raise subprocess.CalledProcessError(1, "fuse-overlayfs")
-                    return MagicMock(stdout="abc123\n")
+                    if cmd[0] == "git" and cmd[1] == "checkout":
+                        raise subprocess.CalledProcessError(1, "git")
+                    return _REV_PARSED
 
                 mock_run.side_effect = run_side_effect
 
-                with pytest.raises(
-                    RuntimeError, match="Failed to mount overlay filesystem"
-                ):
+                with pytest.raises(RuntimeError, match="Failed to create git branch"):
                     WorktreeOverlayFs.from_branch(mock_git_repo, "main")
 
-                # Directory should be cleaned up
-                papagai_dir = tmp_path / "papagai" / "test-repo"
-                if papagai_dir.exists():
-                    # If directory exists, it should be empty
-                    assert len(list(papagai_dir.iterdir())) == 0
+                # Should have attempted to unmount
+                unmount_calls = _calls_for(mock_run, "fusermount")
+                assert len(unmount_calls) == 1
+                assert unmount_calls[0][1] == "-u"
 
-    def test_from_branch_cleanup_on_git_branch_failure(self, mock_git_repo, tmp_path):
-        """Test from_branch unmounts and cleans up if git branch creation fails."""
-        with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch(
-                "papagai.worktree.WorktreeOverlayFs.get_fusermount_binary",
-                return_value="fusermount",
-            ):
-                with patch("papagai.worktree.run_command") as mock_run:
-                    # Make git checkout fail, but fuse-overlayfs and rev-parse succeed
-                    def run_side_effect(cmd, **kwargs):
-                        if cmd[0] == "git" and cmd[1] == "checkout":
-                            raise subprocess.CalledProcessError(1, "git")
-                        return MagicMock(stdout="abc123\n")
-
-                    mock_run.side_effect = run_side_effect
-
-                    with pytest.raises(
-                        RuntimeError, match="Failed to create git branch"
-                    ):
-                        WorktreeOverlayFs.from_branch(mock_git_repo, "main")
-
-                    # Should have attempted to unmount
-                    unmount_calls = [
-                        c for c in mock_run.call_args_list if c[0][0][0] == "fusermount"
-                    ]
-                    assert len(unmount_calls) == 1
-                    assert unmount_calls[0][0][0][1] == "-u"
-
-    def test_from_branch_creates_unique_branches(self, mock_git_repo, tmp_path):
+    def test_from_branch_creates_unique_branches(
+        self, mock_run, mock_git_repo, tmp_path
+    ):
         """Test from_branch creates unique branch names on each call."""
         with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
+            mock_run.return_value = MagicMock()
 
-                overlay_fs1 = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
-                overlay_fs2 = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+            overlay_fs1 = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+            overlay_fs2 = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
 
-                assert overlay_fs1.branch != overlay_fs2.branch
-                assert overlay_fs1.overlay_base_dir != overlay_fs2.overlay_base_dir
+            assert overlay_fs1.branch != overlay_fs2.branch
+            assert overlay_fs1.overlay_base_dir != overlay_fs2.overlay_base_dir
 
 
-@patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"})
+@pytest.mark.usefixtures("mock_run", "xdg_cache_home")
 class TestOverlayFsCleanup:
     """Tests for WorktreeOverlayFs._cleanup() method."""
 
-    def test_cleanup_unmounts_overlay_filesystem(self, mock_git_repo, tmp_path):
+    def test_cleanup_unmounts_overlay_filesystem(self, mock_run, mock_overlay_fs):
         """Test cleanup unmounts the overlay filesystem."""
-        overlay_fs = WorktreeOverlayFs(
-            worktree_dir=tmp_path / "mounted",
-            branch="test-branch",
-            repo_dir=mock_git_repo,
-            overlay_base_dir=tmp_path / "overlay",
-            mount_dir=tmp_path / "mounted",
-        )
-        overlay_fs.mount_dir.mkdir(parents=True)
+        overlay_fs = mock_overlay_fs
 
         with patch(
             "papagai.worktree.WorktreeOverlayFs.get_fusermount_binary",
             return_value="fusermount",
         ):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
+            mock_run.return_value = _OK
 
-                overlay_fs._cleanup()
+            overlay_fs._cleanup()
 
-                # Find the fusermount call
-                unmount_calls = [
-                    c for c in mock_run.call_args_list if c[0][0][0] == "fusermount"
-                ]
-                assert len(unmount_calls) == 1
-                assert unmount_calls[0][0][0] == [
-                    "fusermount",
-                    "-u",
-                    str(overlay_fs.mount_dir),
-                ]
+            # Find the fusermount call
+            unmount_calls = _calls_for(mock_run, "fusermount")
+            assert len(unmount_calls) == 1
+            assert unmount_calls[0] == [
+                "fusermount",
+                "-u",
+                str(overlay_fs.mount_dir),
+            ]
 
-    def test_cleanup_removes_overlay_base_directory(self, mock_git_repo, tmp_path):
+    def test_cleanup_removes_overlay_base_directory(self, mock_run, mock_overlay_fs):
         """Test cleanup removes the entire overlay base directory."""
-        overlay_base = tmp_path / "overlay"
-        overlay_base.mkdir(parents=True)
-        mount_dir = overlay_base / "mounted"
-        mount_dir.mkdir()
+        overlay_base = mock_overlay_fs.overlay_base_dir
 
         # Create some files in the overlay directory
-        (overlay_base / "upperdir").mkdir()
-        (overlay_base / "workdir").mkdir()
-        (overlay_base / "upperdir" / "test.txt").write_text("test")
+        _mkfiles(overlay_base, {"upperdir/test.txt": "test", "workdir": None})
 
-        overlay_fs = WorktreeOverlayFs(
-            worktree_dir=mount_dir,
-            branch="test-branch",
-            repo_dir=mock_git_repo,
-            overlay_base_dir=overlay_base,
-            mount_dir=mount_dir,
-        )
+        mock_run.return_value = _OK
 
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
+        mock_overlay_fs._cleanup()
 
-            overlay_fs._cleanup()
+        # Directory should be removed
+        assert not overlay_base.exists()
 
-            # Directory should be removed
-            assert not overlay_base.exists()
-
-    def test_cleanup_commits_uncommitted_changes(self, mock_git_repo, tmp_path, caplog):
+    def test_cleanup_commits_uncommitted_changes(
+        self, mock_run, mock_overlay_fs, caplog
+    ):
         """Test cleanup commits uncommitted changes with FIXME message."""
-        overlay_base = tmp_path / "overlay"
-        mount_dir = overlay_base / "mounted"
-        mount_dir.mkdir(parents=True)
+        overlay_fs = mock_overlay_fs
 
-        overlay_fs = WorktreeOverlayFs(
-            worktree_dir=mount_dir,
-            branch="test-branch",
-            repo_dir=mock_git_repo,
-            overlay_base_dir=overlay_base,
-            mount_dir=mount_dir,
-        )
-
-        with patch("papagai.worktree.run_command") as mock_run:
-            # Track which commands are being called
-            call_count = [0]
-
-            def run_side_effect(cmd, **kwargs):
-                call_count[0] += 1
-                # First call is git diff - return non-zero to indicate changes present
-                if call_count[0] == 1 and cmd[1] == "diff":
-                    result = MagicMock()
-                    result.returncode = 1
-                    return result
-                # All other calls succeed
-                return MagicMock()
-
-            mock_run.side_effect = run_side_effect
-
-            with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
-                overlay_fs._cleanup()
+        # git diff returns non-zero to indicate changes present
+        recorder = _RunRecorder({("git", "diff", "--quiet"): _FAIL})
+        mock_run.side_effect = recorder
 
-            # Should call:
-            # 1. git diff --quiet --exit-code (returns 1)
-            # 2. git add -A
-            # 3. git commit -m "FIXME: changes left in worktree"
-            # 4. git fetch (pull branch from overlay)
-            # 5. git rev-parse --verify (verify branch)
-            # 6. git branch -f papagai/latest <branch>
-            # 7. fusermount -u
-            assert mock_run.call_count == 7
-
-            # Check that git add and git commit were called
-            calls = mock_run.call_args_list
-            add_call = calls[1][0][0]
-            commit_call = calls[2][0][0]
-
-            assert add_call == ["git", "add", "-A"]
-            assert commit_call == [
-                "git",
-                "commit",
-                "-m",
-                "FIXME: changes left in worktree",
-            ]
+        with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
+            overlay_fs._cleanup()
 
-            # Check warning message
-            log_output = caplog.text
-            assert "Uncommitted changes found in worktree" in log_output
-            assert "committing them" in log_output
+        # Should call:
+        # 1. git diff --quiet --exit-code (returns 1)
+        # 2. git add -A
+        # 3. git commit -m "FIXME: changes left in worktree"
+        # 4. git fetch (pull branch from overlay)
+        # 5. git rev-parse --verify (verify branch)
+        # 6. git branch -f papagai/latest <branch>
+        # 7. fusermount -u
+        assert mock_run.call_count == 7
+
+        # Check that git add and git commit were called
+        [(add_call, _)] = recorder.by_op(("git", "add", "-A"))
+        [(commit_call, _)] = recorder.by_op(("git", "commit", "-m"))
+
+        assert add_call == ["git", "add", "-A"]
+        assert commit_call == [
+            "git",
+            "commit",
+            "-m",
+            "FIXME: changes left in worktree",
+        ]
+
+        # Check warning message
+        log_output = caplog.text
+        assert "Uncommitted changes found in worktree" in log_output
+        assert "committing them" in log_output
 
     def test_cleanup_handles_unmount_failure_gracefully(
-        self, mock_git_repo, tmp_path, caplog
+        self, mock_run, mock_overlay_fs, caplog
     ):
         """Test cleanup handles unmount failures gracefully."""
-        overlay_base = tmp_path / "overlay"
-        mount_dir = overlay_base / "mounted"
-        mount_dir.mkdir(parents=True)
-
-        overlay_fs = WorktreeOverlayFs(
-            worktree_dir=mount_dir,
-            branch="test-branch",
-            repo_dir=mock_git_repo,
-            overlay_base_dir=overlay_base,
-            mount_dir=mount_dir,
-        )
+        overlay_fs = mock_overlay_fs
 
         with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
             with patch(
                 "papagai.worktree.WorktreeOverlayFs.get_fusermount_binary",
                 return_value="fusermount",
             ):
-                with patch("papagai.worktree.run_command") as mock_run:
 
-                    def run_side_effect(cmd, **kwargs):
-                        if cmd[0] == "fusermount":
-                            raise subprocess.CalledProcessError(1, "fusermount")
-                        return MagicMock()
+                def run_side_effect(cmd, **kwargs):
+                    if cmd[0] == "fusermount":
+                        raise subprocess.CalledProcessError(1, "fusermount")
+                    return _OK
 
-                    mock_run.side_effect = run_side_effect
+                mock_run.side_effect = run_side_effect
 
-                    overlay_fs._cleanup()
+                overlay_fs._cleanup()
 
-                    # Check warning message
-                    log_output = caplog.text
-                    assert "Failed to unmount" in log_output
-                    assert "To clean up the worktree, run:" in log_output
+                # Check warning message
+                log_output = caplog.text
+                assert "Failed to unmount" in log_output
+                assert "To clean up the worktree, run:" in log_output
 
     def test_cleanup_handles_exceptions_gracefully(
-        self, mock_git_repo, tmp_path, caplog
+        self, mock_run, mock_overlay_fs, caplog
     ):
         """Test cleanup handles exceptions without crashing."""
-        overlay_fs = WorktreeOverlayFs(
-            worktree_dir=tmp_path / "mounted",
-            branch="test-branch",
-            repo_dir=mock_git_repo,
-            overlay_base_dir=tmp_path / "overlay",
-            mount_dir=tmp_path / "mounted",
-        )
+        overlay_fs = mock_overlay_fs
 
         with caplog.at_level(logging.WARNING, logger="papagai.worktree"):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.side_effect = Exception("Unexpected error")
+            mock_run.side_effect = Exception("Unexpected error")
 
-                # Should not raise, just log warning
-                overlay_fs._cleanup()
+            # Should not raise, just log warning
+            overlay_fs._cleanup()
 
-                log_output = caplog.text
-                assert "Error during cleanup" in log_output
+            log_output = caplog.text
+            assert "Error during cleanup" in log_output
 
 
-@patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"})
+@pytest.mark.usefixtures("mock_run", "xdg_cache_home")
 class TestOverlayFsContextManager:
     """Tests for WorktreeOverlayFs context manager functionality."""
 
-    def test_context_manager_calls_cleanup_on_exit(self, mock_git_repo, tmp_path):
+    def test_context_manager_calls_cleanup_on_exit(self, mock_overlay_fs):
         """Test context manager calls cleanup on exit."""
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
-
-            overlay_fs = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+        overlay_fs = mock_overlay_fs
 
         with patch.object(overlay_fs, "_cleanup") as mock_cleanup:
             with overlay_fs as wt:
                 assert wt is overlay_fs
             mock_cleanup.assert_called_once()
 
-    def test_context_manager_cleanup_on_exception(self, mock_git_repo, tmp_path):
+    def test_context_manager_cleanup_on_exception(self, mock_overlay_fs):
         """Test cleanup is called even when exception occurs in with block."""
-        with patch("papagai.worktree.run_command") as mock_run:
-            mock_run.return_value = MagicMock()
-
-            overlay_fs = WorktreeOverlayFs.from_branch(mock_git_repo, "main")
+        overlay_fs = mock_overlay_fs
 
         with patch.object(overlay_fs, "_cleanup") as mock_cleanup:
             try:
@@ -1340,34 +1226,31 @@ class TestOverlayFsContextManager:
             mock_cleanup.assert_called_once()
 
 
-@patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/test-cache"})
+@pytest.mark.usefixtures("mock_run", "xdg_cache_home")
 class TestOverlayFsIntegration:
     """Integration tests for WorktreeOverlayFs."""
 
-    def test_full_workflow_with_context_manager(self, mock_git_repo, tmp_path):
+    def test_full_workflow_with_context_manager(
+        self, mock_run, mock_git_repo, tmp_path
+    ):
         """Test complete workflow: create, use, cleanup."""
         with patch(
             "papagai.worktree.WorktreeOverlayFs.get_fusermount_binary",
             return_value="fusermount",
         ):
-            with patch("papagai.worktree.run_command") as mock_run:
-                mock_run.return_value = MagicMock()
-
-                with WorktreeOverlayFs.from_branch(
-                    mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
-                ) as overlay_fs:
-                    # Verify overlay was created
-                    assert overlay_fs.branch.startswith(f"{BRANCH_PREFIX}/main")
-                    assert overlay_fs.repo_dir == mock_git_repo
-                    assert overlay_fs.worktree_dir == overlay_fs.mount_dir
-                    assert overlay_fs.overlay_base_dir is not None
-
-                # Verify mount and unmount were called
-                mount_calls = [
-                    c for c in mock_run.call_args_list if c[0][0][0] == "fuse-overlayfs"
-                ]
-                unmount_calls = [
-                    c for c in mock_run.call_args_list if c[0][0][0] == "fusermount"
-                ]
-                assert len(mount_calls) == 1
-                assert len(unmount_calls) == 1
+            mock_run.return_value = MagicMock()
+
+            with WorktreeOverlayFs.from_branch(
+                mock_git_repo, "main", branch_prefix=f"{BRANCH_PREFIX}/"
+            ) as overlay_fs:
+                # Verify overlay was created
+                assert overlay_fs.branch.startswith(f"{BRANCH_PREFIX}/main")
+                assert overlay_fs.repo_dir == mock_git_repo
+                assert overlay_fs.worktree_dir == overlay_fs.mount_dir
+                assert overlay_fs.overlay_base_dir is not None
+
+            # Verify mount and unmount were called
+            mount_calls = _calls_for(mock_run, "fuse-overlayfs")
+            unmount_calls = _calls_for(mock_run, "fusermount")
+            assert len(mount_calls) == 1
+            assert len(unmount_calls) == 1